@@ -5,14 +5,201 @@ Supports: raw text, files, frequency analysis, automatic decoding
 """
 
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox, scrolledtext
-import threading
+from tkinter import ttk, filedialog, messagebox, scrolledtext, font as tkfont
 import time
-import string
-from collections import Counter
 import os
 import re
 
+import caesar_cache
+import caesar_engine
+import caesar_jobs
+import caesar_stats
+import caesar_stream
+from caesar_metrics import METRICS, timed
+
+# Files larger than this are offered a streaming decode instead of being loaded
+LARGE_FILE_THRESHOLD = 32 << 20
+
+# Milliseconds of typing inactivity before the live decode runs
+LIVE_DECODE_DELAY = 500
+
+# Milliseconds between checks of the background job queue
+JOB_POLL_INTERVAL = 50
+
+# Auto-decode scoring: quadgrams stay accurate on messages of a few words
+CRACK_METHOD = 'quadgram'
+
+# Characters counted per step by the statistics job, between cancellation checks
+STATS_BLOCK = 4 << 20
+
+
+def read_file_job(file_path, token, progress):
+    """Background job: read a text file (runs on a worker, no Tk access)"""
+    total = os.path.getsize(file_path)
+    chunks = []
+    done = 0
+    for chunk in caesar_stream.iter_chunks(file_path):
+        chunks.append(chunk)
+        done += len(chunk)
+        progress(done / total if total else 1.0, "Loading file...")
+    # Invalid UTF-8 shows up as U+FFFD instead of vanishing; the streaming
+    # decode and caesar_cli.py work on the raw bytes
+    return b''.join(chunks).decode('utf-8', errors='replace')
+
+
+def crack_job(text, cache, token, progress):
+    """Background job: find the best shift of text (runs on a worker, no Tk access)
+
+    Returns (CrackResult, TextStats). The crack takes its letter histograms
+    from the statistics, which therefore cover the text it examined (none of
+    it on a cache hit); stats_job counts the rest afterwards.
+    """
+    examined = 0
+    stats = caesar_stats.TextStats()
+    
+    def samples():
+        nonlocal examined
+        for sample in caesar_engine.iter_samples(text):
+            token.check()
+            yield sample
+            examined += len(sample)
+            progress(examined / len(text), "Performing frequency analysis...")
+            
+    # Re-cracking the same text (AUTO DECODE twice, reloading a file) is a cache hit
+    result = cache.crack(text, CRACK_METHOD,
+                         crack=lambda _: caesar_engine.crack_incremental(samples(), CRACK_METHOD,
+                                                                         stats=stats))
+    return result, stats
+
+
+def stats_job(text, stats, token, progress):
+    """Background job: finish counting the statistics of text past stats.length"""
+    for start in range(stats.length, len(text), STATS_BLOCK):
+        token.check()
+        stats.update(text[start:start + STATS_BLOCK])
+        progress(stats.length / len(text), "Counting characters...")
+    return stats
+
+
+def stream_decode_job(file_path, destination, options, token, progress):
+    """Background job: crack a file and stream it decoded to destination"""
+    def report(done, total, rate):
+        fraction = done / total if total else 1.0
+        progress(fraction, f"Streaming decode... {fraction:.0%} ({rate / (1 << 20):.1f} MB/s)")
+        
+    try:
+        return caesar_stream.crack_file(file_path, destination, options, CRACK_METHOD,
+                                        progress=report, confidence=caesar_engine.DEFAULT_CONFIDENCE)
+    except caesar_jobs.JobCancelled:
+        if os.path.exists(destination):
+            os.remove(destination)
+        raise
+
+
+class VirtualTextView(tk.Frame):
+    """Read-only text view that only renders the lines currently visible
+
+    The model is any object with __len__, get_lines(start, stop, width) and
+    text(), such as caesar_engine.LineDecoder; lines are pulled from it
+    lazily and cut to width, so opening a huge document, even one long
+    line, costs one screenful of work.
+    """
+    
+    # Longer lines are cut when displayed (the model keeps them whole)
+    MAX_LINE_WIDTH = 2000
+    
+    def __init__(self, master, on_scroll=None, **text_options):
+        super().__init__(master, bg=text_options.get('bg'))
+        self.model = None
+        self.top = 0
+        self.on_scroll = on_scroll
+        
+        self.vbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.vbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.hbar = ttk.Scrollbar(self, orient=tk.HORIZONTAL)
+        self.hbar.pack(side=tk.BOTTOM, fill=tk.X)
+        
+        # One model line per display line, so no wrapping
+        self.text = tk.Text(self, wrap=tk.NONE, state=tk.DISABLED,
+                            xscrollcommand=self.hbar.set, **text_options)
+        self.text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.hbar.config(command=self.text.xview)
+        self.line_height = tkfont.Font(font=self.text['font']).metrics('linespace')
+        
+        self.text.bind('<Configure>', lambda event: self.render())
+        self.text.bind('<MouseWheel>', self.on_wheel)
+        self.text.bind('<Button-4>', lambda event: self.scroll_to(self.top - 3))
+        self.text.bind('<Button-5>', lambda event: self.scroll_to(self.top + 3))
+        
+    @property
+    def visible_lines(self):
+        return max(1, self.text.winfo_height() // self.line_height)
+        
+    def set_model(self, model):
+        self.model = model
+        self.render()
+        
+    def line_count(self):
+        return len(self.model) if self.model is not None else 0
+        
+    @timed('render')
+    def render(self):
+        total = self.line_count()
+        visible = self.visible_lines
+        self.top = max(0, min(self.top, total - visible))
+        lines = (self.model.get_lines(self.top, self.top + visible, self.MAX_LINE_WIDTH)
+                 if total else [])
+        
+        self.text.config(state=tk.NORMAL)
+        self.text.delete('1.0', tk.END)
+        self.text.insert('1.0', '\n'.join(lines))
+        self.text.config(state=tk.DISABLED)
+        self.update_scrollbar()
+        
+    def update_scrollbar(self):
+        total = self.line_count()
+        if total:
+            self.vbar.set(self.top / total, min(1.0, (self.top + self.visible_lines) / total))
+        else:
+            self.vbar.set(0.0, 1.0)
+            
+    def lines_changed(self, first, last, count):
+        """The model replaced lines first..last-1 with count lines (LineDecoder.update)
+
+        Edits below the visible window leave it as it is, so only the
+        scrollbar moves; anything else is re-rendered.
+        """
+        visible = self.visible_lines
+        if first >= self.top + visible and self.top <= self.line_count() - visible:
+            self.update_scrollbar()
+        else:
+            self.render()
+            
+
+    def scroll_to(self, line, notify=True):
+        line = max(0, min(line, self.line_count() - self.visible_lines))
+        if line == self.top:
+            return
+        self.top = line
+        self.render()
+        if notify and self.on_scroll is not None:
+            self.on_scroll(line)
+            
+    def yview(self, *args):
+        # Scrollbar protocol: ('moveto', fraction) or ('scroll', n, 'units'|'pages')
+        if args[0] == 'moveto':
+            self.scroll_to(int(float(args[1]) * self.line_count()))
+        elif args[0] == 'scroll':
+            step = self.visible_lines if args[2] == 'pages' else 1
+            self.scroll_to(self.top + int(args[1]) * step)
+            
+    def on_wheel(self, event):
+        self.scroll_to(self.top - (event.delta // 120 or (1 if event.delta > 0 else -1)) * 3)
+        
+    def get_text(self):
+        return self.model.text() if self.model is not None else ''
+
+
 class CaesarDecoder:
     def __init__(self):
         self.root = tk.Tk()
@@ -24,20 +211,27 @@ class CaesarDecoder:
         self.input_text = tk.StringVar()
         self.shift_value = tk.IntVar(value=0)
         self.auto_decode = tk.BooleanVar(value=True)
-        self.case_sensitive = tk.BooleanVar(value=False)
+        self.case_sensitive = tk.BooleanVar(value=True)
         self.preserve_spaces = tk.BooleanVar(value=True)
+        self.show_performance = tk.BooleanVar(value=False)
         
-        # English letter frequencies
-        self.english_freq = {
-            'e': 12.7, 't': 9.1, 'a': 8.2, 'o': 7.5, 'i': 7.0, 'n': 6.7,
-            's': 6.3, 'h': 6.1, 'r': 6.0, 'd': 4.3, 'l': 4.0, 'c': 2.8,
-            'u': 2.8, 'm': 2.4, 'w': 2.4, 'f': 2.2, 'g': 2.0, 'y': 2.0,
-            'p': 1.9, 'b': 1.3, 'v': 1.0, 'k': 0.8, 'j': 0.15, 'x': 0.15,
-            'q': 0.10, 'z': 0.07
-        }
+        # Lazy per-shift candidates from the last auto-decode
+        self.candidates = []
+        
+        # Live decoding: pending after() id, edit generation and line cache
+        self.pending_decode = None
+        self.decode_generation = 0
+        self.line_decoder = None
+        
+        # Crack results and decoded outputs, keyed on the content
+        self.cache = caesar_cache.CrackCache()
+        
+        # Background work runs here; results come back through poll_jobs
+        self.jobs = caesar_jobs.JobScheduler()
         
         self.setup_ui()
         self.center_window()
+        self.root.after(JOB_POLL_INTERVAL, self.poll_jobs)
         
     def setup_ui(self):
         # Style configuration
@@ -119,6 +313,7 @@ class CaesarDecoder:
                                                    font=('Consolas', 11), insertbackground=colors['fg'])
         self.text_input.pack(fill=tk.BOTH, expand=True, pady=(5, 0))
         self.text_input.bind('<KeyRelease>', self.on_text_change)
+        self.text_input.config(yscrollcommand=self.on_input_scroll)
         
         # Controls section
         controls_frame = tk.LabelFrame(main_frame, text=" ⚙️ CONTROLS ", bg=colors['bg'], 
@@ -161,6 +356,12 @@ class CaesarDecoder:
                                 command=self.decode_text)
         space_cb.pack(anchor=tk.W)
         
+        perf_cb = tk.Checkbutton(options_frame, text="Performance tab", variable=self.show_performance,
+                               bg=colors['bg'], fg=colors['fg'], selectcolor=colors['input_bg'],
+                               activebackground=colors['bg'], activeforeground=colors['fg'],
+                               command=self.toggle_performance_tab)
+        perf_cb.pack(anchor=tk.W)
+        
         # Results section
         results_frame = tk.LabelFrame(main_frame, text=" 🔍 RESULTS ", bg=colors['bg'], 
                                     fg=colors['accent'], font=('Helvetica', 12, 'bold'))
@@ -189,10 +390,11 @@ class CaesarDecoder:
                            relief='flat', padx=10, pady=5)
         save_btn.pack(side=tk.RIGHT)
         
-        self.result_text = scrolledtext.ScrolledText(decoded_frame, bg=colors['input_bg'], 
-                                                    fg=colors['fg'], font=('Consolas', 11),
-                                                    state=tk.DISABLED)
-        self.result_text.pack(fill=tk.BOTH, expand=True)
+        # Only the visible part of the decoded text is ever rendered
+        self.result_view = VirtualTextView(decoded_frame, on_scroll=self.on_result_scroll,
+                                           bg=colors['input_bg'], fg=colors['fg'],
+                                           font=('Consolas', 11))
+        self.result_view.pack(fill=tk.BOTH, expand=True)
         
         # Analysis tab
         analysis_frame = tk.Frame(self.notebook, bg=colors['bg'])
@@ -212,10 +414,43 @@ class CaesarDecoder:
                                                           state=tk.DISABLED)
         self.possibilities_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        # Status bar
-        self.status_bar = tk.Label(main_frame, text="Ready", bg=colors['input_bg'], fg=colors['fg'],
+        # Performance tab (hidden until enabled in the options)
+        self.performance_frame = tk.Frame(self.notebook, bg=colors['bg'])
+        
+        performance_header = tk.Frame(self.performance_frame, bg=colors['bg'])
+        performance_header.pack(fill=tk.X, padx=5, pady=(5, 0))
+        
+        reset_btn = tk.Button(performance_header, text="↺ RESET", command=self.reset_metrics,
+                            bg=colors['error'], fg=colors['fg'], font=('Helvetica', 9, 'bold'),
+                            relief='flat', padx=10, pady=3)
+        reset_btn.pack(side=tk.RIGHT)
+        
+        refresh_btn = tk.Button(performance_header, text="⟳ REFRESH", command=self.refresh_metrics,
+                              bg=colors['button_bg'], fg=colors['fg'], font=('Helvetica', 9, 'bold'),
+                              relief='flat', padx=10, pady=3)
+        refresh_btn.pack(side=tk.RIGHT, padx=(0, 5))
+        
+        self.performance_text = scrolledtext.ScrolledText(self.performance_frame, bg=colors['input_bg'],
+                                                         fg=colors['fg'], font=('Consolas', 10),
+                                                         state=tk.DISABLED)
+        self.performance_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.notebook.bind('<<NotebookTabChanged>>', lambda event: self.refresh_metrics())
+        
+        # Status bar with job progress
+        status_frame = tk.Frame(main_frame, bg=colors['bg'])
+        status_frame.pack(fill=tk.X, side=tk.BOTTOM, pady=(10, 0))
+        
+        self.cancel_btn = tk.Button(status_frame, text="✖ CANCEL", command=self.cancel_job,
+                                    bg=colors['error'], fg=colors['fg'], font=('Helvetica', 8, 'bold'),
+                                    relief='flat', padx=8, state=tk.DISABLED)
+        self.cancel_btn.pack(side=tk.RIGHT, padx=(5, 0))
+        
+        self.progress_bar = ttk.Progressbar(status_frame, mode='determinate', maximum=100, length=200)
+        self.progress_bar.pack(side=tk.RIGHT, padx=(5, 0))
+        
+        self.status_bar = tk.Label(status_frame, text="Ready", bg=colors['input_bg'], fg=colors['fg'],
                                   relief=tk.SUNKEN, anchor=tk.W, font=('Helvetica', 9))
-        self.status_bar.pack(fill=tk.X, side=tk.BOTTOM, pady=(10, 0))
+        self.status_bar.pack(fill=tk.X, side=tk.LEFT, expand=True)
         
     def center_window(self):
         self.root.update_idletasks()
@@ -227,6 +462,63 @@ class CaesarDecoder:
         self.status_bar.config(text=message, fg=color)
         self.root.update_idletasks()
         
+    def start_job(self, fn, *args, name, on_done):
+        # Supersedes whatever job is running
+        def finished(result):
+            self.job_finished()
+            on_done(result)
+            
+        self.jobs.submit(fn, *args, name=name, on_done=finished, on_error=self.job_failed,
+                         on_progress=self.job_progress)
+        self.progress_bar['value'] = 0
+        self.cancel_btn.config(state=tk.NORMAL)
+        
+    def poll_jobs(self):
+        try:
+            self.jobs.poll()
+        finally:
+            self.root.after(JOB_POLL_INTERVAL, self.poll_jobs)
+            
+    def job_progress(self, fraction, message):
+        self.progress_bar['value'] = fraction * 100
+        if message:
+            self.status_bar.config(text=message, fg='#ffc107')
+            
+    def job_finished(self):
+        self.progress_bar['value'] = 0
+        self.cancel_btn.config(state=tk.DISABLED)
+        self.root.after_idle(self.refresh_metrics)
+        
+    def toggle_performance_tab(self):
+        if self.show_performance.get():
+            self.notebook.add(self.performance_frame, text="⏱ Performance")
+            self.notebook.select(self.performance_frame)
+        else:
+            self.notebook.hide(self.performance_frame)
+            
+    def refresh_metrics(self):
+        # Only worth rendering while the tab is shown
+        if not self.show_performance.get():
+            return
+        self.performance_text.config(state=tk.NORMAL)
+        self.performance_text.delete('1.0', tk.END)
+        self.performance_text.insert('1.0', "=== PERFORMANCE ===\n\n" + METRICS.report())
+        self.performance_text.config(state=tk.DISABLED)
+        
+    def reset_metrics(self):
+        METRICS.reset()
+        self.refresh_metrics()
+        
+    def job_failed(self, error):
+        self.job_finished()
+        self.update_status(f"Error: {error}", '#dc3545')
+        
+    def cancel_job(self):
+        if self.jobs.busy:
+            self.jobs.cancel()
+            self.job_finished()
+            self.update_status("Cancelled", '#ffc107')
+        
     def load_file(self):
         try:
             file_path = filedialog.askopenfilename(
@@ -235,29 +527,57 @@ class CaesarDecoder:
             )
             
             if file_path:
-                self.update_status("Loading file...", '#ffc107')
-                
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
-                    content = file.read()
+                size = os.path.getsize(file_path)
+                if size > LARGE_FILE_THRESHOLD and messagebox.askyesno(
+                        "Large file",
+                        f"This file is {size / (1 << 20):.0f} MB.\n"
+                        "Decode it straight to an output file without loading it?"):
+                    self.stream_decode_file(file_path)
+                    return
                     
-                self.text_input.delete('1.0', tk.END)
-                self.text_input.insert('1.0', content)
-                
-                filename = os.path.basename(file_path)
-                self.update_status(f"File loaded: {filename} ({len(content)} characters)", '#28a745')
-                
-                if self.auto_decode.get():
-                    threading.Thread(target=self.auto_decode_text, daemon=True).start()
+                self.update_status("Loading file...", '#ffc107')
+                self.start_job(read_file_job, file_path, name="Load file",
+                               on_done=lambda content: self.file_loaded(file_path, content))
                     
         except Exception as e:
             messagebox.showerror("Error", f"Unable to load file:\n{str(e)}")
             self.update_status("Loading error", '#dc3545')
             
+    def file_loaded(self, file_path, content):
+        with METRICS.stage('render'):
+            self.text_input.delete('1.0', tk.END)
+            self.text_input.insert('1.0', content)
+        
+        filename = os.path.basename(file_path)
+        self.update_status(f"File loaded: {filename} ({len(content)} characters)", '#28a745')
+        
+        if self.auto_decode.get():
+            self.auto_decode_text()
+        else:
+            self.decode_text()
+            
+    def stream_decode_file(self, file_path):
+        destination = filedialog.asksaveasfilename(
+            title="Save decoded file",
+            defaultextension=".txt",
+            filetypes=[("Text files", "*.txt"), ("All files", "*.*")]
+        )
+        if not destination:
+            self.update_status("Streaming decode cancelled", '#ffc107')
+            return
+            
+        filename = os.path.basename(destination)
+        self.update_status("Streaming decode...", '#ffc107')
+        self.start_job(stream_decode_job, file_path, destination, self.decode_options(),
+                       name="Stream decode",
+                       on_done=lambda result: self.update_status(
+                           f"Decoded with shift {-result.best_shift} to {filename}", '#28a745'))
+        
     def clear_all(self):
+        self.jobs.cancel()
+        self.job_finished()
         self.text_input.delete('1.0', tk.END)
-        self.result_text.config(state=tk.NORMAL)
-        self.result_text.delete('1.0', tk.END)
-        self.result_text.config(state=tk.DISABLED)
+        self.result_view.set_model(None)
         
         self.analysis_text.config(state=tk.NORMAL)
         self.analysis_text.delete('1.0', tk.END)
@@ -267,154 +587,112 @@ class CaesarDecoder:
         self.possibilities_text.delete('1.0', tk.END)
         self.possibilities_text.config(state=tk.DISABLED)
         
+        self.candidates = []
         self.shift_value.set(0)
         self.result_info.config(text="Ready to decode")
         self.update_status("Interface cleared", '#28a745')
         
-    def caesar_cipher(self, text, shift):
-        result = []
-        
-        for char in text:
-            if char.isalpha():
-                ascii_offset = ord('A') if char.isupper() else ord('a')
-                shifted = (ord(char) - ascii_offset + shift) % 26
-                result.append(chr(shifted + ascii_offset))
-            else:
-                if self.preserve_spaces.get() or not char.isspace():
-                    result.append(char)
-                    
-        return ''.join(result)
-        
-    def calculate_frequency_score(self, text):
-        if not text:
-            return 0
-            
-        # Count letters
-        letter_count = Counter()
-        total_letters = 0
-        
-        for char in text.lower():
-            if char.isalpha():
-                letter_count[char] += 1
-                total_letters += 1
-                
-        if total_letters == 0:
-            return 0
-            
-        # Calculate score based on English frequencies
-        score = 0
-        for letter, count in letter_count.items():
-            frequency = (count / total_letters) * 100
-            expected_freq = self.english_freq.get(letter, 0.01)
-            score += abs(frequency - expected_freq)
-            
-        return 1000 / (score + 1)  # Lower score is better
-        
-    def find_best_shift(self, text):
-        if not text.strip():
-            return 0
-            
-        self.update_status("Performing frequency analysis...", '#ffc107')
-        
-        best_shift = 0
-        best_score = 0
-        scores = []
-        
-        for shift in range(26):
-            decoded = self.caesar_cipher(text, -shift)
-            score = self.calculate_frequency_score(decoded)
-            scores.append((shift, score, decoded))
-            
-            if score > best_score:
-                best_score = score
-                best_shift = shift
-                
-        return best_shift, scores
+    def decode_options(self):
+        # Read the Tk variables once, on the main thread
+        return caesar_engine.DecodeOptions(preserve_case=self.case_sensitive.get(),
+                                           preserve_spaces=self.preserve_spaces.get())
         
     def auto_decode_text(self):
         text = self.text_input.get('1.0', tk.END).strip()
         if not text:
             return
             
+        # Widgets and Tk variables are read here, on the main thread
+        options = self.decode_options()
+        self.update_status("Performing frequency analysis...", '#ffc107')
+        self.start_job(crack_job, text, self.cache, name="Auto-decode",
+                       on_done=lambda done: self.apply_crack(text, options, *done))
+        
+    def apply_crack(self, text, options, result, stats):
         try:
-            self.update_status("Auto-decoding in progress...", '#ffc107')
-            
-            best_shift, all_scores = self.find_best_shift(text)
+            best_shift = result.best_shift
+            self.candidates = caesar_engine.candidates(text, result.scores, options)
             self.shift_value.set(-best_shift if best_shift > 0 else 26 - best_shift)
             
             # Update display
             self.decode_text()
-            self.show_analysis(all_scores)
-            self.show_all_possibilities(all_scores)
+            self.show_analysis(self.candidates)
+            self.show_all_possibilities(self.candidates)
             
-            self.update_status(f"Auto-decode complete - Optimal shift: {-best_shift}", '#28a745')
+            self.update_status(f"Auto-decode complete - Optimal shift: {-best_shift} "
+                               f"({result.confidence:.2%} confidence from "
+                               f"{result.examined}/{len(text)} characters)", '#28a745')
+            
+            # The decode is on screen; the statistics follow once counted
+            candidates = self.candidates
+            self.start_job(stats_job, text, stats, name="Text statistics",
+                           on_done=lambda stats: self.show_analysis(candidates, stats))
             
         except Exception as e:
             self.update_status(f"Auto-decode error: {str(e)}", '#dc3545')
             
-    def show_analysis(self, scores):
+    @timed('render')
+    def show_analysis(self, candidates, stats=None):
         self.analysis_text.config(state=tk.NORMAL)
         self.analysis_text.delete('1.0', tk.END)
         
-        analysis = "=== FREQUENCY ANALYSIS ===\n\n"
+        parts = ["=== FREQUENCY ANALYSIS ===\n\n"]
         
         # Sort by score
-        sorted_scores = sorted(scores, key=lambda x: x[1], reverse=True)
+        sorted_candidates = sorted(candidates, key=lambda c: c.score, reverse=True)
         
-        analysis += "Top 5 most probable shifts:\n"
-        analysis += "-" * 50 + "\n"
+        parts.append("Top 5 most probable shifts:\n")
+        parts.append("-" * 50 + "\n")
         
-        for i, (shift, score, decoded) in enumerate(sorted_scores[:5]):
-            analysis += f"#{i+1} - Shift: -{shift:2d} | Score: {score:6.2f}\n"
-            preview = decoded[:100].replace('\n', ' ')
-            if len(decoded) > 100:
-                preview += "..."
-            analysis += f"     Preview: {preview}\n\n"
+        for i, candidate in enumerate(sorted_candidates[:5]):
+            parts.append(f"#{i+1} - Shift: -{candidate.shift:2d} | Score: {candidate.score:6.2f}\n")
+            preview = candidate.preview(100, "...").replace('\n', ' ')
+            parts.append(f"     Preview: {preview}\n\n")
             
-        # Statistics
-        text = self.text_input.get('1.0', tk.END).strip()
-        analysis += "\n=== TEXT STATISTICS ===\n"
-        analysis += f"Total length: {len(text)} characters\n"
-        
-        letters = sum(1 for c in text if c.isalpha())
-        analysis += f"Letters: {letters}\n"
-        
-        if letters > 0:
-            analysis += f"Spaces: {text.count(' ')}\n"
-            analysis += f"Digits: {sum(1 for c in text if c.isdigit())}\n"
-            analysis += f"Punctuation: {len(text) - letters - text.count(' ') - sum(1 for c in text if c.isdigit())}\n"
+        # Statistics, counted during the crack and by stats_job
+        parts.append("\n=== TEXT STATISTICS ===\n")
+        if stats is None:
+            parts.append("Counting characters...\n")
+        else:
+            parts.append(f"Total length: {stats.length} characters\n")
+            parts.append(f"Letters: {stats.letters}\n")
+            
+        if stats is not None and stats.letters > 0:
+            parts.append(f"Whitespace: {stats.whitespace}\n")
+            parts.append(f"Digits: {stats.digits}\n")
+            parts.append(f"Punctuation: {stats.punctuation}\n")
             
+            ioc = stats.index_of_coincidence()
+            if ioc is not None:
+                parts.append(f"Index of coincidence: {ioc:.4f} (English ≈ 0.066, random ≈ 0.038)\n")
+                
             # Letter frequency in original text
-            letter_freq = Counter(c.lower() for c in text if c.isalpha())
-            analysis += "\nLetter frequencies (top 10):\n"
-            for letter, count in letter_freq.most_common(10):
-                freq = (count / letters) * 100
-                analysis += f"{letter.upper()}: {count:3d} ({freq:5.2f}%)\n"
+            parts.append("\nLetter frequencies (top 10):\n")
+            for letter, count in stats.top_letters(10):
+                freq = (count / stats.letters) * 100
+                parts.append(f"{letter.upper()}: {count:3d} ({freq:5.2f}%)\n")
                 
-        self.analysis_text.insert('1.0', analysis)
+        self.analysis_text.insert('1.0', ''.join(parts))
         self.analysis_text.config(state=tk.DISABLED)
         
-    def show_all_possibilities(self, scores):
+    @timed('render')
+    def show_all_possibilities(self, candidates):
         self.possibilities_text.config(state=tk.NORMAL)
         self.possibilities_text.delete('1.0', tk.END)
         
-        content = "=== ALL DECODING POSSIBILITIES ===\n\n"
+        parts = ["=== ALL DECODING POSSIBILITIES ===\n\n"]
         
         # Sort by shift
-        sorted_by_shift = sorted(scores, key=lambda x: x[0])
+        sorted_by_shift = sorted(candidates, key=lambda c: c.shift)
         
-        for shift, score, decoded in sorted_by_shift:
-            content += f"Shift -{shift:2d} (Score: {score:6.2f}):\n"
-            content += "-" * 60 + "\n"
+        for candidate in sorted_by_shift:
+            parts.append(f"Shift -{candidate.shift:2d} (Score: {candidate.score:6.2f}):\n")
+            parts.append("-" * 60 + "\n")
             
             # Limit display to avoid overload
-            preview = decoded[:200]
-            if len(decoded) > 200:
-                preview += "... [truncated]"
-                
-            content += preview + "\n\n"
+            parts.append(candidate.preview(200, "... [truncated]") + "\n\n")
             
-        self.possibilities_text.insert('1.0', content)
+        self.possibilities_text.insert('1.0', ''.join(parts))
         self.possibilities_text.config(state=tk.DISABLED)
         
     def on_shift_change(self, value=None):
@@ -422,40 +700,90 @@ class CaesarDecoder:
         self.decode_text()
         
     def on_text_change(self, event=None):
+        # Key releases that did not edit the text (arrows, modifiers...) are ignored
+        if not self.text_input.edit_modified():
+            return
+        self.text_input.edit_modified(False)
+        
         # Real-time decoding if text changes
+        self.decode_generation += 1
+        if self.pending_decode is not None:
+            self.root.after_cancel(self.pending_decode)
+            self.pending_decode = None
+            
         if self.auto_decode.get():
-            # Delay to avoid too many calls
-            self.root.after(500, self.decode_text)
+            # Debounce: only the last keystroke of a burst triggers a decode
+            self.pending_decode = self.root.after(LIVE_DECODE_DELAY, self.live_decode,
+                                                  self.decode_generation)
         else:
+            self.live_decode(self.decode_generation)
+            
+    def on_input_scroll(self, first, last):
+        self.text_input.vbar.set(first, last)
+        if self.line_decoder is not None:
+            top = int(self.text_input.index('@0,0').split('.')[0]) - 1
+            self.result_view.scroll_to(top, notify=False)
+            
+    def on_result_scroll(self, line):
+        if self.line_decoder is not None:
+            self.text_input.yview(f"{line + 1}.0")
+            
+    def live_decode(self, generation):
+        self.pending_decode = None
+        if generation != self.decode_generation:
+            return  # superseded by a newer edit
+            
+        decoder = self.line_decoder
+        if (decoder is None or decoder.shift != self.shift_value.get()
+                or decoder.options != self.decode_options()):
+            self.decode_text()
+            return
+            
+        text = self.text_input.get('1.0', 'end-1c')
+        if not text.strip():
             self.decode_text()
+            return
             
+        # Swap in the edited lines; only the visible window gets decoded, and
+        # only if the edit reaches it
+        self.result_view.lines_changed(*decoder.update(text))
+        
+        info = f"Decoded with shift {decoder.shift} • {len(text)} characters"
+        self.result_info.config(text=info)
+        
     def decode_text(self):
-        text = self.text_input.get('1.0', tk.END).strip()
-        if not text:
-            self.result_text.config(state=tk.NORMAL)
-            self.result_text.delete('1.0', tk.END)
-            self.result_text.config(state=tk.DISABLED)
+        self.decode_generation += 1
+        self.line_decoder = None
+        
+        text = self.text_input.get('1.0', 'end-1c')
+        if not text.strip():
+            self.result_view.set_model(None)
             self.result_info.config(text="No text to decode")
             return
             
         try:
             shift = self.shift_value.get()
-            decoded = self.caesar_cipher(text, shift)
-            
-            self.result_text.config(state=tk.NORMAL)
-            self.result_text.delete('1.0', tk.END)
-            self.result_text.insert('1.0', decoded)
-            self.result_text.config(state=tk.DISABLED)
+            options = self.decode_options()
+            if options.preserve_spaces:
+                # Lines are decoded lazily, as the viewer asks for them
+                self.line_decoder = caesar_engine.LineDecoder(shift, options)
+                self.line_decoder.update(text)
+                self.result_view.set_model(self.line_decoder)
+                length = len(text)
+            else:
+                decoded = self.cache.decode(text, shift, options)
+                self.result_view.set_model(caesar_engine.WrappedLines(decoded))
+                length = len(decoded)
             
             # Result info
-            info = f"Decoded with shift {shift} • {len(decoded)} characters"
+            info = f"Decoded with shift {shift} • {length} characters"
             self.result_info.config(text=info)
             
         except Exception as e:
             self.result_info.config(text=f"Error: {str(e)}")
             
     def save_result(self):
-        decoded_text = self.result_text.get('1.0', tk.END).strip()
+        decoded_text = self.result_view.get_text().strip()
         if not decoded_text:
             messagebox.showwarning("Warning", "No result to save")
             return
@@ -480,7 +808,10 @@ class CaesarDecoder:
             self.update_status("Save error", '#dc3545')
             
     def run(self):
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            self.jobs.shutdown()
 
 def main():
     """Main entry point of the application"""
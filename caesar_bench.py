@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for the Caesar engine hot paths - runs headless
+Measures throughput, latency percentiles and peak memory per stage and
+backend on seeded synthetic English, checks shift-detection accuracy,
+and compares everything against a stored baseline JSON.
+
+Examples:
+    caesar_bench.py --sizes 1K,1M,16M --output report.json
+    caesar_bench.py --baseline baseline.json --threshold 0.2
+    caesar_bench.py --sizes 1G --stages cipher,histogram --repeat 1
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+import caesar_engine
+
+# Common English words with rough relative frequencies
+WORDS = {
+    'the': 56, 'of': 31, 'and': 27, 'to': 26, 'a': 22, 'in': 18, 'is': 10, 'it': 10,
+    'you': 10, 'that': 10, 'he': 9, 'was': 9, 'for': 9, 'on': 8, 'are': 7, 'with': 7,
+    'as': 7, 'his': 6, 'they': 6, 'be': 6, 'at': 6, 'one': 5, 'have': 5, 'this': 5,
+    'from': 5, 'or': 4, 'had': 4, 'by': 4, 'word': 3, 'but': 4, 'what': 3, 'some': 3,
+    'we': 3, 'can': 3, 'out': 3, 'other': 3, 'were': 3, 'all': 3, 'there': 3, 'when': 3,
+    'up': 3, 'use': 2, 'your': 2, 'how': 2, 'said': 2, 'each': 2, 'she': 2, 'which': 2,
+    'their': 2, 'time': 2, 'if': 2, 'will': 2, 'way': 2, 'about': 2, 'many': 2,
+    'then': 2, 'them': 2, 'would': 2, 'write': 1, 'like': 2, 'so': 2, 'these': 2,
+    'her': 2, 'long': 1, 'make': 1, 'thing': 1, 'see': 1, 'him': 1, 'two': 1,
+    'has': 1, 'look': 1, 'more': 1, 'day': 1, 'could': 1, 'go': 1, 'come': 1,
+    'did': 1, 'number': 1, 'sound': 1, 'no': 1, 'most': 1, 'people': 1, 'my': 1,
+    'over': 1, 'know': 1, 'water': 1, 'than': 1, 'call': 1, 'first': 1, 'who': 1,
+    'may': 1, 'down': 1, 'side': 1, 'been': 1, 'now': 1, 'find': 1, 'quickly': 1,
+    'jump': 1, 'zone': 1, 'box': 1, 'very': 1, 'just': 1, 'question': 1, 'voice': 1,
+}
+
+SIZE_UNITS = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+
+DEFAULT_SIZES = '1K,64K,1M,16M'
+DEFAULT_STAGES = ('cipher', 'histogram', 'score', 'crack', 'crack_full')
+ACCURACY_LENGTHS = (10, 20, 30, 50, 100, 200, 500)
+
+# Text is generated in blocks of this size and tiled up to larger sizes
+CORPUS_BLOCK = 1 << 20
+
+
+def parse_size(value):
+    value = value.strip().upper()
+    if value[-1] in SIZE_UNITS:
+        return int(float(value[:-1]) * SIZE_UNITS[value[-1]])
+    return int(value)
+
+
+def format_size(size):
+    for unit in ('G', 'M', 'K'):
+        if size >= SIZE_UNITS[unit] and size % SIZE_UNITS[unit] == 0:
+            return f"{size // SIZE_UNITS[unit]}{unit}"
+    return str(size)
+
+
+def english_text(length, seed=0):
+    """Seeded synthetic English-like text of exactly length characters"""
+    rng = random.Random(seed)
+    words, weights = list(WORDS), list(WORDS.values())
+    block_size = min(length, CORPUS_BLOCK)
+    parts = []
+    size = 0
+    while size < block_size:
+        sentence = rng.choices(words, weights, k=rng.randint(5, 15))
+        sentence[0] = sentence[0].capitalize()
+        line = ' '.join(sentence) + rng.choice('..,!?') + ('\n' if rng.random() < 0.2 else ' ')
+        parts.append(line)
+        size += len(line)
+    block = ''.join(parts)[:block_size]
+    if not block:
+        return ''
+    # Build exactly length characters, without a longer string to slice down
+    return block * (length // block_size) + block[:length % block_size]
+
+
+def stage_function(stage, backend):
+    """Return fn(ciphertext) running one stage on one backend"""
+    if stage == 'cipher':
+        return lambda text: caesar_engine.caesar_cipher(text, -7, backend=backend)
+    if stage == 'histogram':
+        return lambda text: caesar_engine.letter_histogram(text, backend)
+    if stage == 'score':
+        return lambda text: caesar_engine.calculate_frequency_score(text, backend=backend)
+    if stage == 'crack':
+        return lambda text: caesar_engine.crack_text(text, backend=backend)
+    if stage == 'crack_full':
+        return lambda text: caesar_engine.find_best_shift(text, backend=backend)
+    raise ValueError(f"Unknown stage: {stage}")
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(fn, text, repeat, track_memory=True):
+    """Time fn(text) repeat times, then measure its peak memory once"""
+    fn(text)  # warm-up: fills translate tables and imports backends
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(text)
+        timings.append(time.perf_counter() - started)
+
+    peak = None
+    if track_memory:
+        tracemalloc.start()
+        fn(text)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    median = statistics.median(timings)
+    megabytes = len(text) / (1 << 20)
+    return {
+        'size': len(text),
+        'repeat': repeat,
+        'throughput_mb_s': megabytes / median if median > 0 else float('inf'),
+        'p50_ms': percentile(timings, 0.50) * 1000,
+        'p90_ms': percentile(timings, 0.90) * 1000,
+        'p99_ms': percentile(timings, 0.99) * 1000,
+        'peak_bytes': peak,
+    }
+
+
+def available_backends(requested):
+    backends = []
+    for backend in requested:
+        if backend == 'numpy' and caesar_engine.numpy_backend() is None:
+            print("Skipping numpy backend: numpy is not installed", file=sys.stderr)
+            continue
+        backends.append(backend)
+    return backends
+
+
+def run_benchmarks(sizes, stages, backends, repeat, seed=0, track_memory=True, log=None):
+    results = {}
+    for size in sizes:
+        ciphertext = caesar_engine.caesar_cipher(english_text(size, seed), 7)
+        for stage in stages:
+            for backend in backends:
+                key = f"{stage}/{backend}/{format_size(size)}"
+                results[key] = measure(stage_function(stage, backend), ciphertext, repeat,
+                                       track_memory)
+                if log is not None:
+                    log(key, results[key])
+    return results
+
+
+def run_accuracy(lengths, trials, methods, seed=0):
+    """Correct-shift rate of every scoring method for each ciphertext length"""
+    rng = random.Random(seed)
+    source = english_text(CORPUS_BLOCK, seed + 1)
+    accuracy = {}
+    for method in methods:
+        rates = {}
+        for length in lengths:
+            correct = 0
+            for _ in range(trials):
+                start = rng.randrange(len(source) - length)
+                shift = rng.randrange(26)
+                ciphertext = caesar_engine.caesar_cipher(source[start:start + length], shift)
+                best_shift, _ = caesar_engine.find_best_shift(ciphertext, method=method)
+                correct += best_shift == shift
+            rates[str(length)] = correct / trials
+        accuracy[method] = rates
+    return accuracy
+
+
+def compare(report, baseline, threshold):
+    """Return a list of regressions of a report against a baseline report"""
+    regressions = []
+    for key, base in baseline.get('results', {}).items():
+        current = report['results'].get(key)
+        if current is None:
+            continue
+        floor = base['throughput_mb_s'] * (1 - threshold)
+        if current['throughput_mb_s'] < floor:
+            regressions.append(f"{key}: {current['throughput_mb_s']:.1f} MB/s "
+                               f"< {base['throughput_mb_s']:.1f} MB/s baseline")
+
+    for method, rates in baseline.get('accuracy', {}).items():
+        for length, base_rate in rates.items():
+            rate = report.get('accuracy', {}).get(method, {}).get(length)
+            if rate is not None and rate < base_rate - threshold:
+                regressions.append(f"accuracy {method} @ {length} chars: "
+                                   f"{rate:.2%} < {base_rate:.2%} baseline")
+    return regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark the Caesar engine hot paths")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help=f"comma-separated corpus sizes, e.g. 1K,1M,1G (default: {DEFAULT_SIZES})")
+    parser.add_argument('--stages', default=','.join(DEFAULT_STAGES),
+                        help="comma-separated stages to run")
+    parser.add_argument('--backends', default='python,numpy',
+                        help="comma-separated backends (numpy is skipped if missing)")
+    parser.add_argument('--repeat', type=int, default=5, help="timed runs per measurement")
+    parser.add_argument('--seed', type=int, default=0, help="corpus seed")
+    parser.add_argument('--no-memory', action='store_true',
+                        help="skip the tracemalloc peak-memory run")
+    parser.add_argument('--accuracy-trials', type=int, default=200,
+                        help="trials per length for the accuracy check (0 to skip)")
+    parser.add_argument('--output', metavar='PATH', help="write the JSON report to PATH")
+    parser.add_argument('--baseline', metavar='PATH', help="baseline report to compare against")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="allowed fractional throughput drop before failing (default: 0.25)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    sizes = [parse_size(size) for size in args.sizes.split(',')]
+    stages = [stage.strip() for stage in args.stages.split(',')]
+    backends = available_backends([b.strip() for b in args.backends.split(',')])
+
+    def log(key, result):
+        peak = result['peak_bytes']
+        memory = f"{peak / (1 << 20):8.1f} MB peak" if peak is not None else ""
+        print(f"{key:28s} {result['throughput_mb_s']:9.1f} MB/s  "
+              f"p50 {result['p50_ms']:9.2f} ms  p99 {result['p99_ms']:9.2f} ms  {memory}",
+              file=sys.stderr)
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': caesar_engine.numpy_backend() is not None,
+            'seed': args.seed,
+        },
+        'results': run_benchmarks(sizes, stages, backends, args.repeat, args.seed,
+                                  not args.no_memory, log),
+    }
+
+    if args.accuracy_trials:
+        report['accuracy'] = run_accuracy(ACCURACY_LENGTHS, args.accuracy_trials,
+                                          caesar_engine.METHODS, args.seed)
+        for method, rates in report['accuracy'].items():
+            summary = '  '.join(f"{length}:{rate:.0%}" for length, rate in rates.items())
+            print(f"accuracy {method:9s} {summary}", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+        regressions = compare(report, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
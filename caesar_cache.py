@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache for crack results and decoded outputs
+Entries are keyed on a BLAKE2 digest of the input plus the engine options.
+Crack results can also be persisted to a SQLite file so batch re-runs over
+unchanged corpora skip the work entirely.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import caesar_engine
+import caesar_stream
+
+DEFAULT_MAX_BYTES = 64 << 20
+
+
+def content_key(data):
+    """Fast digest of str or bytes content"""
+    if isinstance(data, str):
+        data = data.encode('utf-8', 'surrogatepass')
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def freq_key(freq):
+    """Short stable key for a letter frequency table"""
+    return content_key(repr(sorted(freq.items())))[:12]
+
+
+class LRUCache:
+    """Least-recently-used mapping bounded by the total size of its values"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, size=1):
+        with self._lock:
+            if size > self.max_bytes:
+                return  # would evict everything else
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+            self._entries[key] = (value, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= evicted
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+class SQLiteStore:
+    """Small on-disk key -> JSON store, plus a stat index of file digests"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        # Worker processes may share the file, so wait for locks rather than fail
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._db:
+            self._db.execute("CREATE TABLE IF NOT EXISTS entries "
+                             "(key TEXT PRIMARY KEY, value TEXT, stored REAL)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS files "
+                             "(path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, digest TEXT)")
+
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key, value):
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?)",
+                             (key, json.dumps(value), time.time()))
+
+    def file_digest(self, path, stat):
+        with self._lock:
+            row = self._db.execute("SELECT size, mtime_ns, digest FROM files WHERE path = ?",
+                                   (path,)).fetchone()
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return row[2]
+        return None
+
+    def put_file_digest(self, path, stat, digest):
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                             (path, stat.st_size, stat.st_mtime_ns, digest))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class CrackCache:
+    """Caches crack results and decoded text
+
+    Everything lives in a size-bounded in-memory LRU; with a path, crack
+    results are also persisted to SQLite. Decoded outputs are only kept in
+    memory. Text and file results have separate keys: their digests and
+    examined counts are over characters and bytes respectively.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, path=None):
+        self.memory = LRUCache(max_bytes)
+        self.store = SQLiteStore(path) if path else None
+
+    def _lookup(self, key):
+        value = self.memory.get(key)
+        if value is None and self.store is not None:
+            value = self.store.get(key)
+            if value is not None:
+                self.memory.put(key, value, 256)
+        return value
+
+    def _remember(self, key, value, size=256):
+        self.memory.put(key, value, size)
+        if self.store is not None:
+            self.store.put(key, value)
+
+    def crack(self, text, method='distance', freq=caesar_engine.ENGLISH_FREQ,
+              confidence=caesar_engine.DEFAULT_CONFIDENCE, digest=None, crack=None):
+        """Cached caesar_engine.crack_text (or crack(text) if given)"""
+        digest = digest or content_key(text)
+        key = f"crack-text:{digest}:{method}:{freq_key(freq)}:{confidence}"
+        result = self._lookup(key)
+        if result is None:
+            if crack is not None:
+                result = crack(text)
+            else:
+                result = caesar_engine.crack_text(text, method, freq, confidence)
+            self._remember(key, list(result))
+        return caesar_engine.CrackResult(*result)
+
+    def decode(self, text, shift, options=caesar_engine.DEFAULT_OPTIONS, digest=None):
+        """Cached caesar_engine.caesar_cipher, kept in memory only"""
+        digest = digest or content_key(text)
+        key = ('decoded', digest, shift % 26, options)
+        decoded = self.memory.get(key)
+        if decoded is None:
+            decoded = caesar_engine.caesar_cipher(text, shift, options)
+            self.memory.put(key, decoded, len(decoded))
+        return decoded
+
+    def file_key(self, path, chunk_size=caesar_stream.DEFAULT_CHUNK_SIZE, use_mmap=False):
+        """Digest of a file's content; unchanged files (same size and mtime) aren't re-read"""
+        path = os.path.realpath(path)
+        stat = os.stat(path)
+        if self.store is not None:
+            digest = self.store.file_digest(path, stat)
+            if digest is not None:
+                return digest
+
+        hasher = hashlib.blake2b(digest_size=16)
+        for chunk in caesar_stream.iter_chunks(path, chunk_size, use_mmap):
+            hasher.update(chunk)
+        digest = hasher.hexdigest()
+        if self.store is not None:
+            self.store.put_file_digest(path, stat, digest)
+        return digest
+
+    def crack_file(self, source, method='distance', freq=caesar_engine.ENGLISH_FREQ,
+                   confidence=None, chunk_size=caesar_stream.DEFAULT_CHUNK_SIZE, use_mmap=False):
+        """Cached caesar_stream.crack_file, without the decode pass"""
+        digest = self.file_key(source, chunk_size, use_mmap)
+        key = f"crack-file:{digest}:{method}:{freq_key(freq)}:{confidence}"
+        result = self._lookup(key)
+        if result is None:
+            result = caesar_stream.crack_file(source, None, method=method, freq=freq,
+                                              chunk_size=chunk_size, use_mmap=use_mmap,
+                                              confidence=confidence)
+            self._remember(key, list(result))
+        return caesar_engine.CrackResult(*result)
+
+    def close(self):
+        if self.store is not None:
+            self.store.close()
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Caesar Cipher Decoder - command-line batch mode
+Decodes, cracks or scans many files across a process pool and writes one
+JSON Lines record per file. Never imports tkinter, so startup stays cheap.
+
+Examples:
+    caesar_cli.py crack logs/ -o decoded/ --workers 8
+    caesar_cli.py scan 'dumps/**/*.txt' > scores.jsonl
+    caesar_cli.py crack --stats corpus/ > report.jsonl
+    caesar_cli.py decode --shift 3 message.txt -o out/
+    caesar_cli.py detect --models models/ traffic/ -o decoded/
+    caesar_cli.py segments dump.txt --by paragraph --merge --method quadgram
+    caesar_cli.py search --ciphers rot47,affine,atbash blobs/ -o decoded/
+    caesar_cli.py crack big.log --metrics-json metrics.json --profile crack.prof
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import caesar_cache
+import caesar_engine
+import caesar_keyspace
+import caesar_models
+import caesar_segments
+import caesar_stats
+import caesar_stream
+from caesar_metrics import METRICS, profile_call
+
+Task = namedtuple('Task', ['command', 'path', 'relname', 'shift', 'options', 'method',
+                           'output_dir', 'chunk_size', 'confidence', 'metrics',
+                           'cache_path', 'models', 'ciphers', 'stats', 'use_mmap'])
+
+# One cache and one set of language models per process, opened on first use
+_caches = {}
+_models = {}
+
+
+def get_cache(path):
+    cache = _caches.get(path)
+    if cache is None:
+        cache = _caches[path] = caesar_cache.CrackCache(path=path)
+    return cache
+
+
+def get_models(paths):
+    models = _models.get(paths)
+    if models is None:
+        models = _models[paths] = caesar_models.load_models(paths)
+    return models
+
+
+def expand_inputs(inputs):
+    """Yield (path, relname) for every file named by a path, directory or glob"""
+    for item in inputs:
+        if os.path.isdir(item):
+            for dirpath, _, filenames in os.walk(item):
+                for filename in sorted(filenames):
+                    path = os.path.join(dirpath, filename)
+                    yield path, os.path.relpath(path, item)
+        elif os.path.isfile(item):
+            yield item, os.path.basename(item)
+        else:
+            matches = sorted(glob.glob(item, recursive=True))
+            if not matches:
+                raise FileNotFoundError(f"No such file, directory or pattern: {item}")
+            root = glob_root(item)
+            for path in matches:
+                if os.path.isfile(path):
+                    yield path, os.path.relpath(path, root)
+
+
+def glob_root(pattern):
+    """Longest leading directory of a glob pattern without wildcards"""
+    root = os.path.dirname(pattern)
+    while glob.has_magic(root):
+        root = os.path.dirname(root)
+    return root or os.curdir
+
+
+def duplicate_outputs(tasks):
+    """Input paths of tasks that would write the same output file, grouped by destination"""
+    destinations = {}
+    for task in tasks:
+        key = os.path.normcase(os.path.normpath(task.relname))
+        destinations.setdefault(key, []).append(task.path)
+    return {key: paths for key, paths in destinations.items() if len(paths) > 1}
+
+
+def output_path(task):
+    path = os.path.join(task.output_dir, task.relname)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    return path
+
+
+def run_task(task):
+    """Process one file in a worker and return its JSON-ready record"""
+    if task.metrics:
+        # Worker processes report their own metrics back with each record
+        METRICS.reset()
+    started = time.perf_counter()
+    record = {'file': task.path}
+    try:
+        if task.command == 'decode':
+            destination = output_path(task)
+            caesar_stream.decode_file(task.path, destination, -task.shift, task.options,
+                                      task.chunk_size, task.use_mmap)
+            record['shift'] = task.shift
+            record['output'] = destination
+        elif task.command == 'search':
+            destination = output_path(task) if task.output_dir is not None else None
+            result = caesar_keyspace.crack_file(task.path, destination, task.ciphers,
+                                                task.chunk_size)
+            record['cipher'] = result.key.cipher
+            record['key'] = caesar_keyspace.format_key(result.key)
+            record['a'] = result.key.a
+            record['b'] = result.key.b
+            record['score'] = result.score
+            if len(result.ranking) > 1:
+                record['margin'] = result.score - result.ranking[1][1]
+            record['confidence'] = result.confidence
+            record['examined'] = result.examined
+            if destination is not None:
+                record['output'] = destination
+        elif task.command == 'detect':
+            guess = caesar_models.detect_file(task.path, get_models(task.models), task.chunk_size,
+                                              task.use_mmap)
+            record['language'] = guess.language
+            record['best_shift'] = guess.best_shift
+            record['score'] = guess.score
+            record['confidence'] = guess.confidence
+            record['letters'] = guess.letters
+            record['examined'] = guess.examined
+            if task.output_dir is not None:
+                destination = output_path(task)
+                caesar_stream.decode_file(task.path, destination, -guess.best_shift,
+                                          task.options, task.chunk_size, task.use_mmap)
+                record['output'] = destination
+        else:
+            destination = None
+            if task.command == 'crack' and task.output_dir is not None:
+                destination = output_path(task)
+            stats = None
+            if task.cache_path is not None:
+                result = get_cache(task.cache_path).crack_file(
+                    task.path, task.method, confidence=task.confidence, chunk_size=task.chunk_size,
+                    use_mmap=task.use_mmap)
+                if destination is not None:
+                    caesar_stream.decode_file(task.path, destination, -result.best_shift,
+                                              task.options, task.chunk_size, task.use_mmap)
+                if task.stats:
+                    stats = caesar_stats.file_stats(task.path, task.chunk_size)
+            else:
+                # The crack counts its letters through stats, so the report is free
+                stats = caesar_stats.TextStats() if task.stats else None
+                result = caesar_stream.crack_file(task.path, destination, task.options, task.method,
+                                                  chunk_size=task.chunk_size,
+                                                  use_mmap=task.use_mmap,
+                                                  confidence=task.confidence, stats=stats)
+            ranking = caesar_engine.rank_shifts(result.scores)
+            record['best_shift'] = result.best_shift
+            record['score'] = result.scores[result.best_shift]
+            record['margin'] = result.scores[result.best_shift] - result.scores[ranking[1]]
+            record['confidence'] = result.confidence
+            record['letters'] = result.letters
+            record['examined'] = result.examined
+            if task.command == 'scan':
+                record['scores'] = result.scores
+            if stats is not None:
+                record['stats'] = stats.summary()
+            if destination is not None:
+                record['output'] = destination
+    except (OSError, caesar_models.ModelError) as e:
+        record['error'] = str(e)
+    record['elapsed'] = time.perf_counter() - started
+    if task.metrics:
+        record['metrics'] = METRICS.snapshot()
+    return record
+
+
+def run_tasks(tasks, workers=None, chunksize=1):
+    """Yield records in task order, using a process pool unless workers == 1"""
+    if workers == 1:
+        yield from map(run_task, tasks)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(run_task, tasks, chunksize=chunksize)
+
+
+def positive_int(value):
+    """argparse type for counts and sizes that must be at least 1"""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Caesar cipher batch decoder (no GUI)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('inputs', nargs='+', help="files, directories or glob patterns")
+    common.add_argument('-w', '--workers', type=positive_int, default=None,
+                        help="worker processes (default: CPU count, 1 runs in-process)")
+    common.add_argument('--chunksize', type=positive_int, default=4,
+                        help="files handed to a worker per submission (default: 4)")
+    common.add_argument('--read-size', type=positive_int, default=caesar_stream.DEFAULT_CHUNK_SIZE,
+                        help="bytes read per chunk when streaming a file")
+    common.add_argument('--jsonl', metavar='PATH',
+                        help="write records to PATH instead of stdout")
+    common.add_argument('--metrics-json', metavar='PATH',
+                        help="write per-stage timings and counters to PATH")
+    common.add_argument('--profile', metavar='PATH',
+                        help="run in-process under cProfile, save the stats to PATH "
+                             "and print the top entries")
+
+    # Options shared by only some subcommands, so argparse rejects them elsewhere
+    reading = argparse.ArgumentParser(add_help=False)
+    reading.add_argument('--mmap', action='store_true',
+                         help="read files through a memory map instead of read() calls "
+                              "(whole-file passes and decoding)")
+    scoring = argparse.ArgumentParser(add_help=False)
+    scoring.add_argument('--method', choices=caesar_engine.METHODS, default='distance',
+                         help="shift scoring method (default: distance)")
+    output = argparse.ArgumentParser(add_help=False)
+    output.add_argument('--lowercase', action='store_true', help="lowercase decoded output")
+    output.add_argument('--strip-spaces', action='store_true',
+                        help="remove whitespace from decoded output")
+    caching = argparse.ArgumentParser(add_help=False)
+    caching.add_argument('--cache', metavar='PATH',
+                         help="SQLite cache of crack results; unchanged files are skipped on re-runs")
+
+    decode = subparsers.add_parser('decode', parents=[common, reading, output],
+                                   help="decode files with a known shift")
+    decode.add_argument('-s', '--shift', type=int, required=True,
+                        help="shift the files were encrypted with")
+    decode.add_argument('-o', '--output-dir', required=True, help="directory for decoded files")
+
+    crack = subparsers.add_parser('crack', parents=[common, reading, scoring, output, caching],
+                                  help="find the best shift and optionally decode")
+    crack.add_argument('-o', '--output-dir', help="directory for decoded files")
+    crack.add_argument('--confidence', type=float, default=caesar_engine.DEFAULT_CONFIDENCE,
+                       help="stop reading once the best shift is this probable "
+                            f"(default: {caesar_engine.DEFAULT_CONFIDENCE})")
+    crack.add_argument('--full', dest='confidence', action='store_const', const=None,
+                       help="always read the whole file before picking a shift")
+    crack.add_argument('--stats', action='store_true',
+                       help="add character, letter frequency and index of coincidence "
+                            "statistics (implies --full)")
+
+    scan = subparsers.add_parser('scan', parents=[common, reading, scoring, caching],
+                                 help="report the score of every shift")
+    scan.add_argument('--stats', action='store_true',
+                      help="add character, letter frequency and index of coincidence statistics")
+
+    detect = subparsers.add_parser('detect', parents=[common, reading, output],
+                                   help="find the best language and shift and optionally decode")
+    detect.add_argument('-o', '--output-dir', help="directory for decoded files")
+    detect.add_argument('--models', action='append', metavar='PATH',
+                        help="language model file or directory, repeatable; used "
+                             "with the built-in English model (default: models/)")
+
+    search = subparsers.add_parser('search', parents=[common],
+                                   help="search Caesar, affine, atbash and ROT47 keys on raw bytes")
+    search.add_argument('-o', '--output-dir', help="directory for decoded files")
+    search.add_argument('--ciphers', default=','.join(caesar_keyspace.CIPHERS),
+                        help="comma-separated keyspaces to search "
+                             f"(default: {','.join(caesar_keyspace.CIPHERS)})")
+
+    segments = subparsers.add_parser('segments', parents=[common, reading, scoring],
+                                     help="crack every line, paragraph or window on its own")
+    segments.add_argument('--by', choices=caesar_segments.SEGMENT_MODES, default='line',
+                          help="how to split files into segments (default: line)")
+    segments.add_argument('--delimiter', help="segment separator for --by delimiter")
+    segments.add_argument('--window', type=positive_int, default=caesar_segments.DEFAULT_WINDOW,
+                          help="segment size in bytes for --by window "
+                               f"(default: {caesar_segments.DEFAULT_WINDOW})")
+    segments.add_argument('--merge', action='store_true',
+                          help="merge adjacent segments that share a shift")
+
+    return parser
+
+
+def segment_records(paths, args):
+    """Yield one record per segment of each file; segments are cracked across the pool"""
+    for path in paths:
+        chunks = caesar_stream.iter_chunks(path, args.read_size, args.mmap)
+        segments = caesar_segments.iter_segments(chunks, args.by, args.delimiter, args.window)
+        try:
+            for result in caesar_segments.crack_segments(segments, args.method,
+                                                         workers=args.workers, merge=args.merge):
+                record = {'file': path}
+                record.update(result._asdict())
+                yield record
+        except OSError as e:
+            yield {'file': path, 'error': str(e)}
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    args = build_parser().parse_args(argv)
+    options = caesar_engine.DecodeOptions(
+        preserve_case=not getattr(args, 'lowercase', False),
+        preserve_spaces=not getattr(args, 'strip_spaces', False))
+
+    if args.profile:
+        args.workers = 1
+    if args.command == 'segments' and args.by == 'delimiter' and not args.delimiter:
+        print("Error: --by delimiter needs --delimiter", file=sys.stderr)
+        return 2
+    ciphers = None
+    if args.command == 'search':
+        ciphers = tuple(cipher.strip() for cipher in args.ciphers.split(','))
+        unknown = set(ciphers) - set(caesar_keyspace.CIPHERS)
+        if unknown:
+            print(f"Error: unknown cipher(s): {', '.join(sorted(unknown))}", file=sys.stderr)
+            return 2
+    if getattr(args, 'stats', False):
+        # Statistics cover the whole file, so the crack must read all of it
+        args.confidence = None
+    # In-process runs record straight into METRICS; workers send snapshots back
+    worker_metrics = bool(args.metrics_json) and args.workers != 1
+
+    try:
+        tasks = [Task(args.command, path, relname, getattr(args, 'shift', 0), options,
+                      getattr(args, 'method', 'distance'), getattr(args, 'output_dir', None),
+                      args.read_size, getattr(args, 'confidence', None), worker_metrics,
+                      getattr(args, 'cache', None),
+                      tuple(args.models) if getattr(args, 'models', None) else None, ciphers,
+                      getattr(args, 'stats', False), getattr(args, 'mmap', False))
+                 for path, relname in expand_inputs(args.inputs)]
+    except FileNotFoundError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    if getattr(args, 'output_dir', None) is not None:
+        # Two workers must never write the same file
+        duplicates = duplicate_outputs(tasks)
+        for relname, paths in duplicates.items():
+            print(f"Error: {', '.join(paths)} would all be written to "
+                  f"{os.path.join(args.output_dir, relname)}", file=sys.stderr)
+        if duplicates:
+            return 2
+
+    METRICS.reset()
+    if args.profile:
+        failed = profile_call(write_records, tasks, args, path=args.profile)
+    else:
+        failed = write_records(tasks, args)
+
+    if args.metrics_json:
+        with open(args.metrics_json, 'w', encoding='utf-8') as file:
+            json.dump(METRICS.snapshot(), file, indent=2)
+
+    return 1 if failed else 0
+
+
+def write_records(tasks, args):
+    """Run the tasks and write their records; return True if any file failed"""
+    out = open(args.jsonl, 'w', encoding='utf-8') if args.jsonl else sys.stdout
+    failed = False
+    try:
+        if args.command == 'segments':
+            records = segment_records([task.path for task in tasks], args)
+        else:
+            records = run_tasks(tasks, args.workers, args.chunksize)
+        for record in records:
+            if 'metrics' in record:
+                METRICS.merge(record.pop('metrics'))
+            failed = failed or 'error' in record
+            out.write(json.dumps(record) + '\n')
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return failed
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+"""
+Caesar cipher engine - headless decoding and frequency analysis
+No tkinter dependency: safe to import from batch jobs and scripts
+"""
+
+import math
+import string
+from collections import Counter, namedtuple
+
+import caesar_ngram
+from caesar_metrics import METRICS, timed
+
+# English letter frequencies
+ENGLISH_FREQ = {
+    'e': 12.7, 't': 9.1, 'a': 8.2, 'o': 7.5, 'i': 7.0, 'n': 6.7,
+    's': 6.3, 'h': 6.1, 'r': 6.0, 'd': 4.3, 'l': 4.0, 'c': 2.8,
+    'u': 2.8, 'm': 2.4, 'w': 2.4, 'f': 2.2, 'g': 2.0, 'y': 2.0,
+    'p': 1.9, 'b': 1.3, 'v': 1.0, 'k': 0.8, 'j': 0.15, 'x': 0.15,
+    'q': 0.10, 'z': 0.07
+}
+
+# Expected frequency used for letters missing from the table
+UNKNOWN_FREQ = 0.01
+
+# Scoring methods, all computed from the same 26-letter histogram
+SCORING_METHODS = ('distance', 'chi2', 'loglik')
+
+# Every method accepted when the text itself is at hand: 'quadgram' runs a
+# loglik histogram pre-pass, then rescores only its top shifts with quadgrams
+METHODS = SCORING_METHODS + ('quadgram',)
+QUADGRAM_TOP_K = 5
+# Input kept by crack_incremental for quadgram rescoring (non-letters included)
+QUADGRAM_HEAD = caesar_ngram.MAX_LETTERS * 4
+
+# Early-exit cracking stops once the winning shift is this probable
+DEFAULT_CONFIDENCE = 0.9999
+MIN_SAMPLE_LETTERS = 200
+FIRST_SAMPLE_SIZE = 4096
+
+CrackResult = namedtuple('CrackResult', ['best_shift', 'scores', 'confidence',
+                                         'examined', 'letters'])
+
+DecodeOptions = namedtuple('DecodeOptions', ['preserve_case', 'preserve_spaces'],
+                           defaults=(True, True))
+DEFAULT_OPTIONS = DecodeOptions()
+
+# Backends: 'auto' uses NumPy for letter counts when installed and the input
+# is large enough
+BACKENDS = ('auto', 'python', 'numpy')
+NUMPY_THRESHOLD = 1 << 20
+_numpy_backend = None
+
+# (shift, preserve_case, is_bytes) -> translate table, filled on first use
+_TABLES = {}
+
+# (lowercase, uppercase) letter pairs, a to z, for counting letters case-insensitively
+LETTER_PAIRS = list(zip(string.ascii_lowercase, string.ascii_uppercase))
+BYTE_LETTER_PAIRS = list(zip(string.ascii_lowercase.encode(), string.ascii_uppercase.encode()))
+
+
+def translation_table(shift, preserve_case=True, is_bytes=False):
+    """Return the cached str (or bytes) translate table for a shift (any integer)"""
+    shift %= 26
+    key = (shift, preserve_case, is_bytes)
+    table = _TABLES.get(key)
+    if table is None:
+        lower = string.ascii_lowercase
+        upper = string.ascii_uppercase
+        shifted_lower = lower[shift:] + lower[:shift]
+        shifted_upper = upper[shift:] + upper[:shift]
+        if not preserve_case:
+            shifted_upper = shifted_lower
+        if is_bytes:
+            table = bytes.maketrans((lower + upper).encode(),
+                                    (shifted_lower + shifted_upper).encode())
+        else:
+            table = str.maketrans(lower + upper, shifted_lower + shifted_upper)
+        _TABLES[key] = table
+    return table
+
+
+def numpy_backend():
+    """Import the optional NumPy backend on first use - None if numpy is missing
+
+    Imported lazily so that command-line runs on small inputs don't pay
+    for importing numpy.
+    """
+    global _numpy_backend
+    if _numpy_backend is None:
+        try:
+            import caesar_numpy
+            _numpy_backend = caesar_numpy
+        except ImportError:
+            _numpy_backend = False
+    return _numpy_backend or None
+
+
+def use_numpy(data, backend='auto'):
+    """Decide whether data should go through the NumPy backend"""
+    if backend == 'auto':
+        return len(data) >= NUMPY_THRESHOLD and numpy_backend() is not None
+    if backend == 'numpy':
+        if numpy_backend() is None:
+            raise RuntimeError("NumPy backend requested but numpy is not installed")
+        return True
+    if backend == 'python':
+        return False
+    raise ValueError(f"Unknown backend: {backend}")
+
+
+@timed('decode')
+def caesar_cipher(text, shift, options=DEFAULT_OPTIONS, backend='auto'):
+    """Shift every ASCII letter of text (str, bytes or bytearray) by shift positions"""
+    METRICS.count('decoded_chars', len(text))
+    # str/bytes.translate outruns the NumPy gather (see caesar_bench.py),
+    # so 'auto' only uses NumPy for counting
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}")
+    if backend == 'numpy' and use_numpy(text, backend):
+        result = numpy_backend().translate(text, shift, options.preserve_case)
+    else:
+        is_bytes = not isinstance(text, str)
+        result = text.translate(translation_table(shift, options.preserve_case, is_bytes))
+    if not options.preserve_spaces:
+        # split() drops exactly the characters isspace() accepts
+        result = result[:0].join(result.split())
+    return result
+
+
+def calculate_frequency_score(text, freq=ENGLISH_FREQ, backend='auto'):
+    """Score text against a letter frequency table - higher is better"""
+    return shift_scores(letter_histogram(text, backend), 'distance', freq)[0]
+
+
+@timed('histogram')
+def letter_histogram(text, backend='auto'):
+    """Count the 26 ASCII letters of text in one pass, case-insensitively"""
+    METRICS.count('histogram_chars', len(text))
+    if use_numpy(text, backend):
+        return numpy_backend().letter_histogram(text)
+    return _count_letters(text)
+
+
+def _count_letters(text):
+    counts = Counter(text)
+    pairs = LETTER_PAIRS if isinstance(text, str) else BYTE_LETTER_PAIRS
+    return [counts[lower] + counts[upper] for lower, upper in pairs]
+
+
+def expected_frequencies(freq=ENGLISH_FREQ):
+    """Return the 26 expected percentages of a frequency table, a to z"""
+    return [freq.get(letter, UNKNOWN_FREQ) for letter in string.ascii_lowercase]
+
+
+def log_probabilities(freq=ENGLISH_FREQ):
+    """Natural-log probability of each letter a-z under a frequency table"""
+    expected = expected_frequencies(freq)
+    freq_total = sum(expected)
+    return [math.log(e / freq_total) for e in expected]
+
+
+@timed('scoring')
+def shift_scores(histogram, method='distance', freq=ENGLISH_FREQ):
+    """Score all 26 shifts of a ciphertext histogram - higher is better
+
+    Decoding with shift s turns ciphertext letter (i + s) into plaintext
+    letter i, so every shift is scored by rotating the histogram instead
+    of decoding the text.
+    """
+    if method not in SCORING_METHODS:
+        raise ValueError(f"Unknown scoring method: {method}")
+    return _score_histogram(histogram, method, freq)
+
+
+def _score_histogram(histogram, method, freq):
+    total = sum(histogram)
+    if total == 0:
+        return [0] * 26
+
+    expected = expected_frequencies(freq)
+    if method == 'chi2':
+        freq_total = sum(expected)
+        expected_counts = [total * e / freq_total for e in expected]
+    elif method == 'loglik':
+        log_probs = log_probabilities(freq)
+        # Short texts leave most of the histogram empty, so only sum present letters
+        present = [(i, count) for i, count in enumerate(histogram) if count]
+
+    scores = []
+    for shift in range(26):
+        if method == 'loglik':
+            # Letter i decodes to letter i - shift; negative indexes wrap around
+            scores.append(sum(count * log_probs[i - shift] for i, count in present))
+            continue
+        rotated = histogram[shift:] + histogram[:shift]
+        if method == 'distance':
+            # Same metric as calculate_frequency_score on the decoded text
+            distance = sum(abs(count * 100 / total - e)
+                           for count, e in zip(rotated, expected) if count)
+            scores.append(1000 / (distance + 1))
+        else:
+            chi2 = sum((count - e) ** 2 / e for count, e in zip(rotated, expected_counts))
+            scores.append(-chi2)
+
+    return scores
+
+
+def rank_shifts(scores):
+    """Return the shifts ordered from best to worst score (ties keep shift order)"""
+    return sorted(range(len(scores)), key=lambda shift: scores[shift], reverse=True)
+
+
+class Candidate:
+    """One possible decoding of a source text, decoded only on demand
+
+    Holds a reference to the source rather than a decoded copy, so keeping
+    all 26 candidates costs about as much memory as the source itself.
+    """
+    __slots__ = ('source', 'shift', 'score', 'options')
+
+    def __init__(self, source, shift, score, options=DEFAULT_OPTIONS):
+        self.source = source
+        self.shift = shift  # subtracted to decode
+        self.score = score
+        self.options = options
+
+    def __repr__(self):
+        return f"Candidate(shift={self.shift}, score={self.score:.2f})"
+
+    def preview(self, length=100, suffix=''):
+        """Decode just the start of the source, adding suffix when it is cut short"""
+        decoded = caesar_cipher(self.source[:length], -self.shift, self.options)
+        if len(self.source) > length:
+            decoded += suffix
+        return decoded
+
+    def text(self, backend='auto'):
+        """Decode the whole source"""
+        return caesar_cipher(self.source, -self.shift, self.options, backend)
+
+
+def candidates(text, scores, options=DEFAULT_OPTIONS):
+    """Wrap per-shift scores into lazy Candidates, in shift order"""
+    return [Candidate(text, shift, score, options) for shift, score in enumerate(scores)]
+
+
+@timed('scoring')
+def quadgram_scores(text, prepass, top=QUADGRAM_TOP_K, model=None):
+    """Rescore the top shifts of a histogram pre-pass with quadgram log-probabilities
+
+    Only the top shifts by prepass score are scored on the letters of text;
+    the others get the score of a decoding with no known quadgram, so they
+    still rank last. Texts too short for quadgrams, or a missing model,
+    fall back to the prepass scores.
+    """
+    model = model or caesar_ngram.default_model()
+    codes = caesar_ngram.letter_codes(text)
+    if model is None or len(codes) < 4:
+        return prepass
+    rescored = model.score_shifts(codes, rank_shifts(prepass)[:top])
+    worst = model.floor * (len(codes) - 3)
+    return [rescored.get(shift, worst) for shift in range(26)]
+
+
+def text_scores(text, histogram, method='distance', freq=ENGLISH_FREQ):
+    """Score all 26 shifts with any of METHODS, given the histogram of text"""
+    if method == 'quadgram':
+        return quadgram_scores(text, shift_scores(histogram, 'loglik', freq))
+    return shift_scores(histogram, method, freq)
+
+
+def find_best_shift(text, freq=ENGLISH_FREQ, method='distance', backend='auto'):
+    """Find the most probable shift of text from a single letter histogram
+
+    Returns (best_shift, [Candidate, ...]) in shift order, where best_shift
+    is the shift that was subtracted to decode the text. Nothing is decoded
+    until a candidate is asked for its preview or text.
+    """
+    scores = text_scores(text, letter_histogram(text, backend), method, freq)
+    return rank_shifts(scores)[0], candidates(text, scores)
+
+
+def shift_posteriors(histogram, freq=ENGLISH_FREQ):
+    """Probability of each shift being the key, from the log-likelihoods
+
+    Assumes a uniform prior over the 26 shifts.
+    """
+    return posteriors(shift_scores(histogram, 'loglik', freq))
+
+
+def posteriors(log_likelihoods):
+    """Normalise per-shift log-likelihoods into probabilities"""
+    peak = max(log_likelihoods)
+    weights = [math.exp(ll - peak) for ll in log_likelihoods]
+    total = sum(weights)
+    return [w / total for w in weights]
+
+
+@timed('histogram')
+def batch_histograms(texts, backend='auto'):
+    """Letter histograms of many small texts, from a single bincount when NumPy is available"""
+    METRICS.count('histogram_chars', sum(len(text) for text in texts))
+    if backend != 'python' and numpy_backend() is not None:
+        return numpy_backend().letter_histograms(texts).tolist()
+    return [_count_letters(text) for text in texts]
+
+
+@timed('scoring')
+def batch_scores(histograms, method='distance', freq=ENGLISH_FREQ, backend='auto'):
+    """shift_scores of many histograms, in one vectorized call when NumPy is available"""
+    if method not in SCORING_METHODS:
+        raise ValueError(f"Unknown scoring method: {method}")
+    if backend != 'python' and histograms and numpy_backend() is not None:
+        backend_module = numpy_backend()
+        if method == 'loglik':
+            scores = backend_module.loglik_scores(histograms, log_probabilities(freq))
+        elif method == 'distance':
+            scores = backend_module.distance_scores(histograms, expected_frequencies(freq))
+        else:
+            scores = backend_module.chi2_scores(histograms, expected_frequencies(freq))
+        return scores.tolist()
+    return [_score_histogram(histogram, method, freq) for histogram in histograms]
+
+
+def crack_many(texts, method='distance', freq=ENGLISH_FREQ, backend='auto'):
+    """Crack a batch of small texts together, reading each one whole
+
+    Histograms and histogram scores are computed for the whole batch at
+    once; quadgram rescoring then runs per text. Returns a CrackResult per text.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown scoring method: {method}")
+    histograms = batch_histograms(texts, backend)
+    prepass = 'loglik' if method == 'quadgram' else method
+    all_scores = batch_scores(histograms, prepass, freq, backend)
+    if prepass == 'loglik':
+        all_logliks = all_scores
+    else:
+        all_logliks = batch_scores(histograms, 'loglik', freq, backend)
+
+    results = []
+    for text, histogram, scores, logliks in zip(texts, histograms, all_scores, all_logliks):
+        if sum(histogram) == 0:
+            scores = logliks = [0] * 26
+        elif method == 'quadgram':
+            scores = quadgram_scores(text, scores)
+        best_shift = rank_shifts(scores)[0]
+        results.append(CrackResult(best_shift, scores, posteriors(logliks)[best_shift],
+                                   len(text), sum(histogram)))
+    return results
+
+
+def iter_samples(text, first_size=FIRST_SAMPLE_SIZE, growth=2):
+    """Yield consecutive slices of text, each growth times larger than the last"""
+    start = 0
+    size = first_size
+    while start < len(text):
+        yield text[start:start + size]
+        start += size
+        size *= growth
+
+
+def crack_incremental(samples, method='distance', freq=ENGLISH_FREQ,
+                      confidence=DEFAULT_CONFIDENCE, min_letters=MIN_SAMPLE_LETTERS,
+                      backend='auto', stats=None):
+    """Crack from successive samples, stopping early once the winner is clear
+
+    After each sample the histogram is updated and the winning shift is
+    accepted as soon as its posterior probability reaches confidence
+    (None reads every sample). Returns a CrackResult whose examined field
+    is the length of input actually read.
+
+    With the 'quadgram' method, early exit follows the loglik pre-pass and
+    only the start of the input is kept for the final rescoring.
+
+    With a caesar_stats.TextStats, each sample is counted once by it and
+    the crack reuses its letter histogram; it covers the examined input.
+    """
+    prepass = 'loglik' if method == 'quadgram' else method
+    histogram = [0] * 26
+    examined = 0
+    head = []
+    for sample in samples:
+        counts = stats.update(sample, backend) if stats is not None else letter_histogram(sample, backend)
+        histogram = [a + b for a, b in zip(histogram, counts)]
+        if method == 'quadgram' and examined < QUADGRAM_HEAD:
+            head.append(sample[:QUADGRAM_HEAD - examined])
+        examined += len(sample)
+        if confidence is not None and sum(histogram) >= min_letters:
+            if _crack_result(histogram, prepass, freq, examined).confidence >= confidence:
+                break
+
+    head = head[0][:0].join(head) if head else ''
+    return _crack_result(histogram, method, freq, examined, head)
+
+
+def _crack_result(histogram, method, freq, examined, head=''):
+    scores = text_scores(head, histogram, method, freq)
+    best_shift = rank_shifts(scores)[0]
+    return CrackResult(best_shift, scores, shift_posteriors(histogram, freq)[best_shift],
+                       examined, sum(histogram))
+
+
+def crack_text(text, method='distance', freq=ENGLISH_FREQ, confidence=DEFAULT_CONFIDENCE,
+               backend='auto'):
+    """Crack text from growing samples - see crack_incremental"""
+    return crack_incremental(iter_samples(text), method, freq, confidence, backend=backend)
+
+
+class LineDecoder:
+    """Lazily decoded view of a text, line by line
+
+    Only the source lines are kept: get_lines() decodes the requested range
+    on demand, so a viewer showing a window of a large document only ever
+    decodes that window. update() swaps in edited text and reports which
+    block of lines changed. Whitespace must be preserved so that decoded
+    lines stay aligned with source lines.
+    """
+
+    def __init__(self, shift=0, options=DEFAULT_OPTIONS):
+        if not options.preserve_spaces:
+            raise ValueError("LineDecoder needs preserve_spaces=True")
+        self.shift = shift
+        self.options = options
+        self.lines = ['']
+
+    def __len__(self):
+        return len(self.lines)
+
+    def update(self, text):
+        """Replace the source text and return the block of lines that changed
+
+        Returns (first, last, count): old lines first..last-1 were replaced
+        by count new lines, with count always at least one.
+        """
+        old = self.lines
+        new = text.split('\n')
+
+        # Leave at least one line on each side so the block is never empty
+        limit = min(len(old), len(new)) - 1
+        first = 0
+        while first < limit and old[first] == new[first]:
+            first += 1
+        common_tail = 0
+        while common_tail < limit - first and old[-1 - common_tail] == new[-1 - common_tail]:
+            common_tail += 1
+
+        self.lines = new
+        return first, len(old) - common_tail, len(new) - common_tail - first
+
+    def get_lines(self, start, stop, width=None):
+        """Decode source lines start..stop-1 with a single translate call
+
+        With a width, only the first width characters of each line are
+        decoded and returned, so a huge single-line document costs no more
+        than a viewer can show.
+        """
+        lines = self.lines[start:stop]
+        if width is not None:
+            lines = [line[:width] for line in lines]
+        return caesar_cipher('\n'.join(lines), self.shift, self.options).split('\n')
+
+    def text(self):
+        return caesar_cipher('\n'.join(self.lines), self.shift, self.options)
+
+
+class WrappedLines:
+    """Fixed-width line view of a text, for output without line breaks"""
+
+    def __init__(self, text, width=120):
+        self.source = text
+        self.width = width
+
+    def __len__(self):
+        return max(1, -(-len(self.source) // self.width))
+
+    def get_lines(self, start, stop, width=None):
+        stop = min(stop, len(self))
+        cut = self.width if width is None else min(width, self.width)
+        return [self.source[i * self.width:i * self.width + cut] for i in range(start, stop)]
+
+    def text(self):
+        return self.source
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Background job scheduler - worker pool, progress queue and cancellation
+Workers never touch the GUI: progress and results are queued, and poll()
+hands them to callbacks on whichever thread calls it (the Tk main loop).
+"""
+
+import itertools
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class JobCancelled(Exception):
+    """Raised inside a job once its cancel token has been set"""
+
+
+class CancelToken:
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def check(self):
+        """Raise JobCancelled if the job has been cancelled"""
+        if self._event.is_set():
+            raise JobCancelled()
+
+
+class Job:
+    """Handle for a submitted job"""
+
+    def __init__(self, job_id, name, token, on_done=None, on_error=None, on_progress=None):
+        self.id = job_id
+        self.name = name
+        self.token = token
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.future = None
+
+    def cancel(self):
+        self.token.cancel()
+
+
+class JobScheduler:
+    """Runs jobs on a thread pool and reports back through a queue
+
+    A job is called as fn(*args, token=token, progress=progress), where
+    progress(fraction, message='') may be called from the worker. Submitting
+    a job supersedes the running one by default: it is cancelled and its
+    remaining events are dropped.
+    """
+
+    def __init__(self, max_workers=2):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='caesar-job')
+        self._events = queue.Queue()
+        self._ids = itertools.count(1)
+        self.current = None
+
+    def submit(self, fn, *args, name='', on_done=None, on_error=None, on_progress=None,
+               supersede=True):
+        """Start fn in the pool and return its Job"""
+        if supersede:
+            self.cancel()
+
+        job = Job(next(self._ids), name, CancelToken(), on_done, on_error, on_progress)
+        self.current = job
+        job.future = self._executor.submit(self._run, job, fn, args)
+        return job
+
+    def _run(self, job, fn, args):
+        def progress(fraction, message=''):
+            job.token.check()
+            self._events.put(('progress', job, (fraction, message)))
+
+        try:
+            result = fn(*args, token=job.token, progress=progress)
+        except JobCancelled:
+            self._events.put(('cancelled', job, None))
+        except Exception as e:
+            self._events.put(('error', job, e))
+        else:
+            self._events.put(('done', job, result))
+
+    def cancel(self):
+        """Cancel the current job, if any"""
+        if self.current is not None:
+            self.current.cancel()
+            self.current = None
+
+    @property
+    def busy(self):
+        return self.current is not None
+
+    def poll(self):
+        """Deliver queued events to their callbacks; call from the GUI thread
+
+        Events of superseded or cancelled jobs are discarded.
+        Returns the number of events processed.
+        """
+        processed = 0
+        while True:
+            try:
+                kind, job, payload = self._events.get_nowait()
+            except queue.Empty:
+                return processed
+            processed += 1
+
+            if job is not self.current:
+                continue
+            if kind == 'progress':
+                if job.on_progress is not None:
+                    job.on_progress(*payload)
+                continue
+
+            self.current = None
+            if kind == 'done' and job.on_done is not None:
+                job.on_done(payload)
+            elif kind == 'error' and job.on_error is not None:
+                job.on_error(payload)
+
+    def shutdown(self):
+        self.cancel()
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Monoalphabetic keyspace search on raw bytes - Caesar, affine, atbash, ROT47
+Every key only relabels byte values, so the histogram of a decoding is the
+ciphertext histogram with its bins permuted. All keys of all ciphers are
+scored from one 256-bin byte histogram, and only the winner is decoded,
+with bytes.translate and a cached 256-byte table.
+"""
+
+import math
+import string
+from collections import Counter, namedtuple
+
+import caesar_engine
+import caesar_ngram
+import caesar_stream
+
+CIPHERS = ('caesar', 'affine', 'atbash', 'rot47')
+
+# Multipliers with an inverse mod 26: 12 of them, times 26 offsets = 312 affine keys
+AFFINE_MULTIPLIERS = (1, 3, 5, 7, 9, 11, 15, 17, 19, 21, 23, 25)
+
+# ROT47 rotates the 94 printable ASCII characters '!' to '~'
+ROT47_FIRST = 33
+ROT47_SIZE = 94
+
+PROSE_BYTES = frozenset((string.ascii_letters + string.digits + " \n.,;:'\"!?-()").encode())
+
+# Encryption parameters: letters encrypt as x -> (a*x + b) mod 26, and
+# ROT47 bytes as c -> 33 + (c - 33 + b) mod 94 (a is 1). Caesar keys have
+# a == 1, so b is the shift caesar_engine subtracts to decode.
+Key = namedtuple('Key', ['cipher', 'a', 'b'])
+
+ATBASH = Key('atbash', 25, 25)
+
+KeyspaceResult = namedtuple('KeyspaceResult', ['key', 'score', 'confidence', 'ranking',
+                                               'examined'])
+
+# key -> 256-byte decode table, filled on first use
+_TABLES = {}
+_byte_log_probs = None
+
+
+def keys(cipher):
+    """All keys of one cipher"""
+    if cipher == 'caesar':
+        return [Key('caesar', 1, b) for b in range(26)]
+    if cipher == 'affine':
+        return [Key('affine', a, b) for a in AFFINE_MULTIPLIERS for b in range(26)]
+    if cipher == 'atbash':
+        return [ATBASH]
+    if cipher == 'rot47':
+        return [Key('rot47', 1, b) for b in range(ROT47_SIZE)]
+    raise ValueError(f"Unknown cipher: {cipher}")
+
+
+def decode_table(key):
+    """Return the cached bytes.translate table that decodes key"""
+    table = _TABLES.get(key)
+    if table is None:
+        mapping = list(range(256))
+        if key.cipher == 'rot47':
+            for c in range(ROT47_FIRST, ROT47_FIRST + ROT47_SIZE):
+                mapping[c] = ROT47_FIRST + (c - ROT47_FIRST - key.b) % ROT47_SIZE
+        else:
+            inverse = next(i for i in range(26) if key.a * i % 26 == 1)
+            for y in range(26):
+                x = inverse * (y - key.b) % 26
+                mapping[ord('a') + y] = ord('a') + x
+                mapping[ord('A') + y] = ord('A') + x
+        table = _TABLES[key] = bytes(mapping)
+    return table
+
+
+def encode_table(key):
+    """bytes.translate table that encrypts with key"""
+    decode = decode_table(key)
+    mapping = bytearray(256)
+    for c, plain in enumerate(decode):
+        mapping[plain] = c
+    return bytes(mapping)
+
+
+def translate(data, table):
+    """bytes.translate for bytes, bytearray or a memoryview over either
+
+    A view spanning its whole buffer is translated straight from that
+    buffer; only a partial view (the last chunk of caesar_stream.iter_views)
+    is copied first.
+    """
+    if isinstance(data, memoryview):
+        owner = data.obj
+        if isinstance(owner, (bytes, bytearray)) and data.nbytes == len(owner):
+            return owner.translate(table)
+        data = data.tobytes()
+    return data.translate(table)
+
+
+def byte_histogram(data, backend='auto'):
+    """Count all 256 byte values of bytes, bytearray or memoryview data"""
+    if caesar_engine.use_numpy(data, backend):
+        return caesar_engine.numpy_backend().byte_histogram(data).tolist()
+    counts = Counter(data)
+    return [counts[value] for value in range(256)]
+
+
+def english_byte_log_probs():
+    """Natural-log probability of each byte value in English text
+
+    Counted once from the built-in corpus with add-one smoothing, or from
+    ENGLISH_FREQ plus spaces if the corpus is unavailable. Only prose
+    characters are counted: the corpus is documentation full of code.
+    """
+    global _byte_log_probs
+    if _byte_log_probs is None:
+        counts = [1] * 256
+        try:
+            for text in caesar_ngram.builtin_corpus():
+                for value, count in Counter(text.encode('utf-8', 'ignore')).items():
+                    if value in PROSE_BYTES:
+                        counts[value] += count
+        except ImportError:
+            for letter, freq in caesar_engine.ENGLISH_FREQ.items():
+                counts[ord(letter)] += int(freq * 1000)
+                counts[ord(letter.upper())] += int(freq * 50)
+            counts[ord(' ')] += 20000
+        total = sum(counts)
+        _byte_log_probs = [math.log(count / total) for count in counts]
+    return _byte_log_probs
+
+
+def score_keys(histogram, candidates, log_probs=None):
+    """Log-likelihood of each key's decoding, from the ciphertext byte histogram"""
+    log_probs = log_probs or english_byte_log_probs()
+    present = [(value, count) for value, count in enumerate(histogram) if count]
+    scores = []
+    for key in candidates:
+        table = decode_table(key)
+        scores.append(sum(count * log_probs[table[value]] for value, count in present))
+    return scores
+
+
+def search(histogram, ciphers=CIPHERS, top=10, log_probs=None):
+    """Find the most likely key over the keyspaces of ciphers
+
+    Returns a KeyspaceResult with the best key, its score, its posterior
+    probability among all distinct keys searched and the top (key, score) pairs.
+    """
+    # Affine keys with a == 1 are Caesar keys and a == b == 25 is atbash:
+    # the specific ciphers go first so that their keys name each decoding
+    unique = {}
+    for cipher in sorted(ciphers, key=lambda cipher: cipher == 'affine'):
+        for key in keys(cipher):
+            unique.setdefault(decode_table(key), key)
+    candidates = list(unique.values())
+    scores = score_keys(histogram, candidates, log_probs)
+    order = sorted(range(len(candidates)), key=lambda i: scores[i], reverse=True)
+    peak = scores[order[0]]
+    total = sum(math.exp(score - peak) for score in scores)
+    ranking = [(candidates[i], scores[i]) for i in order[:top]]
+    return KeyspaceResult(candidates[order[0]], peak, 1 / total, ranking, sum(histogram))
+
+
+def crack_bytes(data, ciphers=CIPHERS, backend='auto'):
+    """Search the keyspaces of ciphers for bytes-like data"""
+    return search(byte_histogram(data, backend), ciphers)
+
+
+def file_byte_histogram(path, chunk_size=caesar_stream.DEFAULT_CHUNK_SIZE):
+    """256-bin histogram of a file, counted from views of one reused read buffer"""
+    histogram = [0] * 256
+    for view in caesar_stream.iter_views(path, chunk_size):
+        histogram = [a + b for a, b in zip(histogram, byte_histogram(view))]
+    return histogram
+
+
+def crack_file(source, destination=None, ciphers=CIPHERS,
+               chunk_size=caesar_stream.DEFAULT_CHUNK_SIZE):
+    """Search a file in one histogram pass and optionally write it decoded"""
+    result = search(file_byte_histogram(source, chunk_size), ciphers)
+    if destination is not None:
+        decode_file(source, destination, result.key, chunk_size)
+    return result
+
+
+def decode_file(source, destination, key, chunk_size=caesar_stream.DEFAULT_CHUNK_SIZE):
+    """Stream source decoded with key into destination; returns bytes written"""
+    table = decode_table(key)
+    written = 0
+    with open(destination, 'wb') as out:
+        for view in caesar_stream.iter_views(source, chunk_size):
+            written += out.write(translate(view, table))
+    return written
+
+
+def format_key(key):
+    """Short human-readable form of a key"""
+    if key.cipher == 'affine':
+        return f"affine a={key.a} b={key.b}"
+    if key.cipher == 'atbash':
+        return "atbash"
+    return f"{key.cipher} {key.b}"
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Hot-path instrumentation - per-stage timings, counters and cProfile capture
+Stages: file_read, histogram, scoring, decode, render. Stage times are
+exclusive: time spent in a stage nested inside another (a decode inside a
+render) counts for the inner stage only, so stage totals add up. The
+process-wide METRICS collector is thread-safe, so worker jobs and the GUI
+share it.
+"""
+
+import cProfile
+import functools
+import io
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+STAGES = ('file_read', 'histogram', 'scoring', 'decode', 'render')
+
+# Stages that are engine work, as opposed to Tk rendering
+ENGINE_STAGES = ('file_read', 'histogram', 'scoring', 'decode')
+
+
+class Metrics:
+    """Accumulates call counts and durations per stage, plus named counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()  # per-thread stack of nested stage times
+        self.enabled = True
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.stages = {}  # name -> [count, total seconds, max seconds]
+            self.counters = {}
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block as one call of stage name, minus its nested stages"""
+        if not self.enabled:
+            yield
+            return
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(0.0)  # seconds spent in nested stages
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            nested = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            self.record(name, elapsed - nested)
+
+    def record(self, name, seconds):
+        with self._lock:
+            stats = self.stages.get(name)
+            if stats is None:
+                self.stages[name] = [1, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                stats[2] = max(stats[2], seconds)
+
+    def count(self, name, amount=1):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + amount
+
+    def snapshot(self):
+        """Return a JSON-ready copy of the current metrics"""
+        with self._lock:
+            stages = {name: {'calls': count, 'total_ms': total * 1000,
+                             'mean_ms': total * 1000 / count, 'max_ms': longest * 1000}
+                      for name, (count, total, longest) in self.stages.items()}
+            return {'stages': stages, 'counters': dict(self.counters),
+                    'bound': bottleneck(stages)}
+
+    def merge(self, snapshot):
+        """Add a snapshot taken elsewhere (e.g. in a worker process)"""
+        with self._lock:
+            for name, stage in snapshot.get('stages', {}).items():
+                stats = self.stages.setdefault(name, [0, 0.0, 0.0])
+                stats[0] += stage['calls']
+                stats[1] += stage['total_ms'] / 1000
+                stats[2] = max(stats[2], stage['max_ms'] / 1000)
+            for name, amount in snapshot.get('counters', {}).items():
+                self.counters[name] = self.counters.get(name, 0) + amount
+
+    def report(self):
+        """Format the metrics as a plain-text table"""
+        snapshot = self.snapshot()
+        lines = [f"{'Stage':12s} {'Calls':>8s} {'Total ms':>11s} {'Mean ms':>10s} {'Max ms':>10s}",
+                 "-" * 55]
+        names = [name for name in STAGES if name in snapshot['stages']]
+        names += sorted(set(snapshot['stages']) - set(STAGES))
+        for name in names:
+            stage = snapshot['stages'][name]
+            lines.append(f"{name:12s} {stage['calls']:8d} {stage['total_ms']:11.2f} "
+                         f"{stage['mean_ms']:10.3f} {stage['max_ms']:10.3f}")
+        if snapshot['counters']:
+            lines.append("")
+            for name, amount in sorted(snapshot['counters'].items()):
+                lines.append(f"{name:24s} {amount:>14,}")
+        lines.append("")
+        lines.append(f"Bound by: {snapshot['bound']}")
+        return '\n'.join(lines)
+
+
+def timed(stage):
+    """Decorator recording every call of a function as one call of stage"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with METRICS.stage(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def bottleneck(stages):
+    """Say whether rendering or engine work dominates, from snapshot stages"""
+    render = stages.get('render', {}).get('total_ms', 0.0)
+    engine = sum(stages.get(name, {}).get('total_ms', 0.0) for name in ENGINE_STAGES)
+    if not render and not engine:
+        return "nothing measured yet"
+    if render > engine:
+        return f"Tk rendering ({render:.1f} ms vs {engine:.1f} ms engine)"
+    return f"decoding engine ({engine:.1f} ms vs {render:.1f} ms rendering)"
+
+
+# Process-wide collector used by the engine, the streaming layer and the GUI
+METRICS = Metrics()
+
+
+def profile_call(fn, *args, path=None, limit=25, stream=None, **kwargs):
+    """Run fn under cProfile, print the top entries and optionally save the stats"""
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(fn, *args, **kwargs)
+    finally:
+        if path:
+            profiler.dump_stats(path)
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(limit)
+        (stream or sys.stderr).write(output.getvalue())
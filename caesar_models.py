@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Language models - precompiled letter and quadgram tables, memory-mapped on load
+A model file holds a small header, 26 unigram frequencies and the 26^4
+quadgram log-probabilities as little-endian float32 arrays, so loading a
+model maps the file instead of parsing it. Worker processes mapping the
+same file share its pages.
+
+Build models from a local corpus, then point the CLI at them:
+    caesar_models.py build fr corpus/fr/*.txt -o models/fr.lm
+    caesar_models.py info models/
+    caesar_cli.py detect --models models/ traffic/
+"""
+
+import argparse
+import glob
+import math
+import mmap
+import os
+import string
+import struct
+import sys
+from array import array
+from collections import namedtuple
+
+import caesar_engine
+import caesar_ngram
+import caesar_stream
+
+MAGIC = b'CAESARLM'
+VERSION = 1
+MODEL_SUFFIX = '.lm'
+
+# magic, version, language name, quadgram floor
+HEADER = struct.Struct('<8sI16sf')
+UNIGRAM_OFFSET = HEADER.size
+QUADGRAM_OFFSET = UNIGRAM_OFFSET + 26 * 4
+
+# Models in this directory are loaded next to the built-in English model
+MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+
+LanguageGuess = namedtuple('LanguageGuess', ['language', 'best_shift', 'score', 'confidence',
+                                             'scores', 'examined', 'letters'])
+
+
+class ModelError(Exception):
+    """Raised for files that are not valid model files"""
+
+
+class LanguageModel:
+    """Letter frequencies (percentages, all 26 letters) and quadgrams of one language"""
+
+    def __init__(self, name, freq, quadgrams=None, path=None):
+        self.name = name
+        self.freq = freq
+        self.quadgrams = quadgrams
+        self.path = path
+
+    def __repr__(self):
+        return f"LanguageModel({self.name!r}, path={self.path!r})"
+
+
+def _little_endian(values):
+    if sys.byteorder == 'big':
+        values = array('f', values)
+        values.byteswap()
+    return values
+
+
+def build_model(name, texts):
+    """Build a model from an iterable of str or bytes corpus texts
+
+    Only ASCII letters are counted, matching what a Caesar shift changes.
+    Letters missing from the corpus get half a count, so no table entry is zero.
+    """
+    texts = list(texts)
+    histogram = [0] * 26
+    for text in texts:
+        histogram = [a + b for a, b in zip(histogram, caesar_engine.letter_histogram(text))]
+    total = sum(histogram)
+    if total == 0:
+        raise ModelError(f"Corpus for {name!r} contains no letters")
+    freq = {letter: max(count, 0.5) * 100 / total
+            for letter, count in zip(string.ascii_lowercase, histogram)}
+    return LanguageModel(name, freq, caesar_ngram.QuadgramModel.from_texts(texts))
+
+
+def save_model(model, path):
+    if model.quadgrams is None:
+        raise ModelError(f"Model {model.name!r} has no quadgram table")
+    name = model.name.encode('utf-8')
+    if len(name) > 16:
+        raise ModelError(f"Language name {model.name!r} is longer than 16 bytes")
+    unigrams = array('f', caesar_engine.expected_frequencies(model.freq))
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, name, model.quadgrams.floor))
+        _little_endian(unigrams).tofile(file)
+        file.write(_little_endian(model.quadgrams.table))
+
+
+def load_model(path):
+    """Map a model file; the quadgram table is read straight from the mapping"""
+    with open(path, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        if size != QUADGRAM_OFFSET + caesar_ngram.TABLE_SIZE * 4:
+            raise ModelError(f"{path}: not a model file (unexpected size {size})")
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, name, floor = HEADER.unpack_from(mapped)
+    if magic != MAGIC or version != VERSION:
+        raise ModelError(f"{path}: not a version {VERSION} model file")
+
+    view = memoryview(mapped)
+    unigrams = _little_endian(view[UNIGRAM_OFFSET:QUADGRAM_OFFSET].cast('f'))
+    table = _little_endian(view[QUADGRAM_OFFSET:].cast('f'))
+    freq = dict(zip(string.ascii_lowercase, unigrams))
+    return LanguageModel(name.rstrip(b'\0').decode('utf-8'), freq,
+                         caesar_ngram.QuadgramModel(table, floor), path)
+
+
+def model_paths(paths):
+    """Expand model files, directories of *.lm files and glob patterns"""
+    for path in paths:
+        if os.path.isdir(path):
+            yield from sorted(glob.glob(os.path.join(path, '*' + MODEL_SUFFIX)))
+        elif os.path.isfile(path):
+            yield path
+        else:
+            matches = sorted(glob.glob(path))
+            if not matches:
+                raise FileNotFoundError(f"No such model file, directory or pattern: {path}")
+            yield from matches
+
+
+def english_model():
+    """The built-in English model: ENGLISH_FREQ plus the default quadgram table"""
+    return LanguageModel('en', caesar_engine.ENGLISH_FREQ, caesar_ngram.default_model())
+
+
+def load_models(paths=None):
+    """Return {language: LanguageModel}: built-in English plus the models at paths
+
+    paths defaults to MODEL_DIR. A loaded model of the same language
+    replaces the built-in English one.
+    """
+    models = {'en': english_model()}
+    if paths is None:
+        paths = [MODEL_DIR] if os.path.isdir(MODEL_DIR) else []
+    for path in model_paths(paths):
+        model = load_model(path)
+        models[model.name] = model
+    return models
+
+
+def rank_languages(histogram, models, head='', top=caesar_engine.QUADGRAM_TOP_K):
+    """Score every shift of every language from one ciphertext histogram
+
+    Each language's shifts are scored on the shared histogram; when every
+    model has quadgrams, each language's top shifts are then rescored on the
+    letters of head. Returns a LanguageGuess whose scores map each language
+    to its 26 shift scores, and whose confidence is the posterior of the
+    winning (language, shift) pair from the letter log-likelihoods.
+    """
+    if not models:
+        raise ModelError("No language models loaded")
+    logliks = {name: caesar_engine.shift_scores(histogram, 'loglik', model.freq)
+               for name, model in models.items()}
+    scores = logliks
+    if head and all(model.quadgrams is not None for model in models.values()):
+        scores = {name: caesar_engine.quadgram_scores(head, logliks[name], top, model.quadgrams)
+                  for name, model in models.items()}
+
+    language, best_shift = max(((name, shift) for name in scores for shift in range(26)),
+                               key=lambda pair: scores[pair[0]][pair[1]])
+    peak = max(max(values) for values in logliks.values())
+    total = sum(math.exp(ll - peak) for values in logliks.values() for ll in values)
+    confidence = math.exp(logliks[language][best_shift] - peak) / total
+    return LanguageGuess(language, best_shift, scores[language][best_shift], confidence,
+                         scores, 0, sum(histogram))
+
+
+def detect_language(text, models, backend='auto'):
+    """Find the best language and shift of a str or bytes ciphertext"""
+    guess = rank_languages(caesar_engine.letter_histogram(text, backend), models,
+                           text[:caesar_engine.QUADGRAM_HEAD])
+    return guess._replace(examined=len(text))
+
+
+def detect_file(path, models, chunk_size=caesar_stream.DEFAULT_CHUNK_SIZE, use_mmap=False):
+    """Find the best language and shift of a file in one streaming histogram pass"""
+    histogram = [0] * 26
+    head = b''
+    examined = 0
+    for chunk in caesar_stream.iter_chunks(path, chunk_size, use_mmap):
+        histogram = [a + b for a, b in zip(histogram, caesar_engine.letter_histogram(chunk))]
+        if examined < caesar_engine.QUADGRAM_HEAD:
+            head += chunk[:caesar_engine.QUADGRAM_HEAD - examined]
+        examined += len(chunk)
+    return rank_languages(histogram, models, head)._replace(examined=examined)
+
+
+def read_corpus(paths):
+    """Yield the bytes of every corpus file named by a path, directory or glob"""
+    for item in paths:
+        if os.path.isdir(item):
+            files = sorted(os.path.join(dirpath, filename)
+                           for dirpath, _, filenames in os.walk(item) for filename in filenames)
+        else:
+            files = [item] if os.path.isfile(item) else sorted(glob.glob(item, recursive=True))
+            if not files:
+                raise FileNotFoundError(f"No such corpus file, directory or pattern: {item}")
+        for path in files:
+            with open(path, 'rb') as file:
+                yield file.read()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Build and inspect Caesar language models")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser('build', help="build a model from a local text corpus")
+    build.add_argument('language', help="language name stored in the model, e.g. fr")
+    build.add_argument('corpus', nargs='+', help="corpus files, directories or glob patterns")
+    build.add_argument('-o', '--output', help=f"model file (default: models/LANGUAGE{MODEL_SUFFIX})")
+
+    info = subparsers.add_parser('info', help="describe model files")
+    info.add_argument('models', nargs='*', help="model files or directories (default: models/)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        if args.command == 'build':
+            model = build_model(args.language, read_corpus(args.corpus))
+            output = args.output or os.path.join(MODEL_DIR, args.language + MODEL_SUFFIX)
+            os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+            save_model(model, output)
+            print(f"Wrote {output}")
+        else:
+            for name, model in load_models(args.models or None).items():
+                top = sorted(model.freq, key=model.freq.get, reverse=True)[:6]
+                print(f"{name:8s} {model.path or '(built-in)'}  most frequent: {''.join(top)}")
+    except (OSError, ModelError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Quadgram scoring - log-probabilities of 4-letter sequences
+The model is a flat array of 26^4 floats indexed with integer arithmetic
+((a*26 + b)*26 + c)*26 + d, so scoring a text involves no dict lookups.
+Only the letters of a text are scored; spaces and punctuation are skipped.
+"""
+
+import math
+import string
+from array import array
+from collections import Counter
+
+TABLE_SIZE = 26 ** 4
+
+# Only this many letters of a text are scored; plenty to rank shifts
+MAX_LETTERS = 2048
+
+# Maps every byte to itself except letters, which map to their code 0-25
+_CODE_TABLE = bytes.maketrans(string.ascii_lowercase.encode() + string.ascii_uppercase.encode(),
+                              bytes(range(26)) * 2)
+_NON_LETTERS = bytes(set(range(256)) - set((string.ascii_letters).encode()))
+
+# shift -> bytes.translate table turning ciphertext codes into plaintext codes
+_SHIFT_TABLES = [bytes([(code - shift) % 26 for code in range(26)]) + bytes(230)
+                 for shift in range(26)]
+
+_default_model = None
+
+
+def letter_codes(data, limit=MAX_LETTERS):
+    """Return the first limit letters of str or bytes data as codes 0-25"""
+    if isinstance(data, str):
+        # Bounded slice: non-letters rarely make up more than half a text
+        data = data[:limit * 4].encode('ascii', 'ignore')
+    return data.translate(None, _NON_LETTERS)[:limit].translate(_CODE_TABLE)
+
+
+class QuadgramModel:
+    """Log10 probabilities of all 26^4 quadgrams in a flat array
+
+    table may be an array('f') or a float memoryview over a mapped model
+    file (see caesar_models).
+    """
+
+    def __init__(self, table, floor):
+        if len(table) != TABLE_SIZE:
+            raise ValueError(f"Quadgram table must have {TABLE_SIZE} entries")
+        self.table = table
+        self.floor = floor  # score of a quadgram never seen in the corpus
+
+    @classmethod
+    def from_counts(cls, counts):
+        """Build a model from a Counter of quadgram indexes"""
+        total = sum(counts.values())
+        if total == 0:
+            raise ValueError("No quadgrams to build a model from")
+        floor = math.log10(0.01 / total)
+        table = array('f', [floor]) * TABLE_SIZE
+        for index, count in counts.items():
+            table[index] = math.log10(count / total)
+        return cls(table, floor)
+
+    @classmethod
+    def from_texts(cls, texts):
+        """Build a model from an iterable of str or bytes corpus texts"""
+        return cls.from_counts(count_quadgrams(texts))
+
+    def score_codes(self, codes):
+        """Sum the log-probabilities of every quadgram in a run of letter codes"""
+        table = self.table
+        return sum(table[((a * 26 + b) * 26 + c) * 26 + d]
+                   for a, b, c, d in zip(codes, codes[1:], codes[2:], codes[3:]))
+
+    def score(self, text):
+        return self.score_codes(letter_codes(text))
+
+    def score_shifts(self, codes, shifts):
+        """Score letter codes decoded with each of shifts, without decoding any text"""
+        return {shift: self.score_codes(codes.translate(_SHIFT_TABLES[shift % 26]))
+                for shift in shifts}
+
+
+def count_quadgrams(texts):
+    """Count the quadgrams of an iterable of corpus texts, letters only"""
+    counts = Counter()
+    for text in texts:
+        if isinstance(text, str):
+            text = text.encode('ascii', 'ignore')
+        codes = text.translate(None, _NON_LETTERS).translate(_CODE_TABLE)
+        counts.update(((a * 26 + b) * 26 + c) * 26 + d
+                      for a, b, c, d in zip(codes, codes[1:], codes[2:], codes[3:]))
+    return counts
+
+
+def builtin_corpus():
+    """English prose that ships with Python: the pydoc topic help texts"""
+    from pydoc_data.topics import topics
+    return topics.values()
+
+
+def default_model():
+    """The English quadgram model, built once from the built-in corpus on first use
+
+    Returns None if the corpus is not available in this Python install.
+    """
+    global _default_model
+    if _default_model is None:
+        try:
+            _default_model = QuadgramModel.from_texts(builtin_corpus())
+        except ImportError:
+            _default_model = False
+    return _default_model or None
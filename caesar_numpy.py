@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+NumPy backend for the Caesar engine - bulk decoding and letter histograms
+Text is handled as a uint8 array (UTF-8 bytes); only ASCII letters change,
+so multi-byte characters pass through untouched.
+"""
+
+import codecs
+
+import numpy as np
+
+# (shift, preserve_case) -> 256-entry uint8 lookup table, filled on first use
+_LUTS = {}
+
+
+def lookup_table(shift, preserve_case=True):
+    """Return the cached byte lookup table for a shift (any integer)"""
+    shift %= 26
+    key = (shift, preserve_case)
+    lut = _LUTS.get(key)
+    if lut is None:
+        lut = np.arange(256, dtype=np.uint8)
+        shifted = (np.arange(26) + shift) % 26
+        lut[ord('a'):ord('z') + 1] = ord('a') + shifted
+        lut[ord('A'):ord('Z') + 1] = (ord('A') if preserve_case else ord('a')) + shifted
+        _LUTS[key] = lut
+    return lut
+
+
+def as_array(data):
+    """View str, bytes, bytearray or memoryview data as a uint8 array"""
+    if isinstance(data, str):
+        data = data.encode('utf-8', 'surrogatepass')
+    return np.frombuffer(data, dtype=np.uint8)
+
+
+def translate(data, shift, preserve_case=True):
+    """Shift every ASCII letter with one lookup-table gather
+
+    Returns the same type as data (str, bytes or bytearray).
+    """
+    # Fancy indexing keeps uint8 indices; np.take(out=...) casts them to intp
+    decoded = lookup_table(shift, preserve_case)[as_array(data)]
+
+    if isinstance(data, str):
+        return codecs.decode(decoded, 'utf-8', 'surrogatepass')
+    if isinstance(data, bytearray):
+        return bytearray(decoded)
+    return decoded.tobytes()
+
+
+# np.bincount casts its input to intp, so large arrays are counted in blocks
+# to keep that temporary copy small
+BINCOUNT_BLOCK = 1 << 20
+
+
+def byte_histogram(data):
+    """Count all 256 byte values of data with np.bincount"""
+    source = as_array(data)
+    counts = np.zeros(256, dtype=np.int64)
+    for start in range(0, len(source), BINCOUNT_BLOCK):
+        counts += np.bincount(source[start:start + BINCOUNT_BLOCK], minlength=256)
+    return counts
+
+
+def letter_histogram(data):
+    """Count the 26 ASCII letters of data with np.bincount, case-insensitively"""
+    counts = byte_histogram(data)
+    return (counts[ord('a'):ord('z') + 1] + counts[ord('A'):ord('Z') + 1]).tolist()
+
+
+def letter_histograms(texts):
+    """Letter histograms of many texts from a single bincount, as a (len(texts), 26) array
+
+    Every byte is offset by 256 times the position of its text, so one
+    bincount over the concatenation counts each text separately. Meant for
+    batches of small texts: the offsets take 8 bytes per input byte.
+    """
+    arrays = [as_array(text) for text in texts]
+    if not arrays:
+        return np.zeros((0, 26), dtype=np.int64)
+    offsets = np.repeat(np.arange(len(arrays), dtype=np.intp) * 256, [len(a) for a in arrays])
+    counts = np.bincount(offsets + np.concatenate(arrays), minlength=256 * len(arrays))
+    counts = counts.reshape(len(arrays), 256)
+    return counts[:, ord('a'):ord('z') + 1] + counts[:, ord('A'):ord('Z') + 1]
+
+
+def loglik_scores(histograms, log_probs):
+    """Log-likelihood of every shift of every histogram with one matrix product
+
+    rotations[i, s] is the log-probability of the letter that ciphertext
+    letter i decodes to under shift s.
+    """
+    letters = np.arange(26)
+    rotations = np.asarray(log_probs)[(letters[:, None] - letters[None, :]) % 26]
+    return np.asarray(histograms) @ rotations
+
+
+def rotated_histograms(histograms):
+    """(n, 26, 26) array whose [t, s] row is histogram t rotated left by shift s"""
+    letters = np.arange(26)
+    return np.asarray(histograms)[:, (letters[None, :] + letters[:, None]) % 26]
+
+
+def distance_scores(histograms, expected):
+    """caesar_engine 'distance' scores of every shift of every histogram
+
+    Empty histograms score 0 for every shift, as in shift_scores.
+    """
+    rotated = rotated_histograms(histograms)
+    totals = rotated[:, 0, :].sum(axis=1)
+    percents = rotated * 100 / np.maximum(totals, 1)[:, None, None]
+    gaps = np.where(rotated > 0, np.abs(percents - np.asarray(expected)), 0)
+    return np.where(totals[:, None] > 0, 1000 / (gaps.sum(axis=2) + 1), 0)
+
+
+def chi2_scores(histograms, expected):
+    """caesar_engine 'chi2' scores (negated chi-squared) of every shift of every histogram"""
+    rotated = rotated_histograms(histograms)
+    totals = rotated[:, 0, :].sum(axis=1)
+    expected = np.asarray(expected, dtype=float)
+    counts = totals[:, None, None] * (expected / expected.sum())
+    chi2 = np.where(counts > 0, (rotated - counts) ** 2 / np.where(counts > 0, counts, 1), 0)
+    return np.where(totals[:, None] > 0, -chi2.sum(axis=2), 0)
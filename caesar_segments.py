@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Per-segment cracking - for documents that join messages with different keys
+Input is split by line, paragraph, delimiter or fixed window, and every
+segment is cracked on its own histogram. Segments are cracked in batches
+across a process pool and results come back in input order, so callers can
+stream them out as they arrive.
+"""
+
+import functools
+import os
+import re
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import caesar_engine
+
+SEGMENT_MODES = ('line', 'paragraph', 'delimiter', 'window')
+DEFAULT_WINDOW = 4096
+
+# A segment with no separator in this many characters is cut here
+MAX_SEGMENT = 16 << 20
+
+# Segments are sent to workers in batches of up to this many characters
+BATCH_SIZE = 256 << 10
+
+Segment = namedtuple('Segment', ['index', 'start', 'end', 'text'])
+
+SegmentResult = namedtuple('SegmentResult', ['index', 'start', 'end', 'best_shift', 'score',
+                                             'confidence', 'letters', 'preview', 'segments'])
+
+_SEPARATORS = {
+    'line': r'\r?\n',
+    'paragraph': r'\r?\n[ \t\r\f\v]*\n',
+}
+
+
+def separator_pattern(mode, delimiter=None, is_bytes=False):
+    """Compiled regex matching the separator between segments"""
+    if mode == 'delimiter':
+        if not delimiter:
+            raise ValueError("The delimiter mode needs a delimiter")
+        pattern = re.escape(delimiter)
+    elif mode in _SEPARATORS:
+        pattern = _SEPARATORS[mode]
+    else:
+        raise ValueError(f"Unknown segment mode: {mode}")
+    return re.compile(pattern.encode() if is_bytes else pattern)
+
+
+def iter_segments(chunks, mode='line', delimiter=None, window=DEFAULT_WINDOW,
+                  max_size=MAX_SEGMENT):
+    """Split a stream of str or bytes chunks into Segments
+
+    Separators are not part of any segment; start and end are offsets into
+    the whole stream. Blank segments are skipped but keep their index.
+    """
+    if mode == 'window' and window <= 0:
+        raise ValueError(f"The window must be positive, got {window}")
+    pattern = None
+    buffer = None
+    offset = 0  # stream offset of buffer[0]
+    index = 0
+
+    for chunk in chunks:
+        if buffer is None:
+            buffer = chunk[:0]
+            if mode != 'window':
+                pattern = separator_pattern(mode, delimiter, isinstance(chunk, bytes))
+        buffer += chunk
+
+        # (start, end) of every complete segment, then where the remainder starts
+        bounds = []
+        cut = 0
+        if mode == 'window':
+            while len(buffer) - cut >= window:
+                bounds.append((cut, cut + window))
+                cut += window
+        else:
+            for match in pattern.finditer(buffer):
+                bounds.append((cut, match.start()))
+                cut = match.end()
+        if len(buffer) - cut > max_size:
+            # No separator in sight: end the segment here rather than grow forever
+            bounds.append((cut, len(buffer)))
+            cut = len(buffer)
+
+        for start, end in bounds:
+            if buffer[start:end].strip():
+                yield Segment(index, offset + start, offset + end, buffer[start:end])
+            index += 1
+        buffer = buffer[cut:]
+        offset += cut
+
+    if buffer and buffer.strip():
+        yield Segment(index, offset, offset + len(buffer), buffer)
+
+
+def split_text(text, mode='line', delimiter=None, window=DEFAULT_WINDOW):
+    """Segments of an in-memory str or bytes text"""
+    return iter_segments([text], mode, delimiter, window)
+
+
+def crack_segment(segment, method='distance', freq=caesar_engine.ENGLISH_FREQ, preview=60):
+    """Crack one segment on its own histogram"""
+    result = caesar_engine.crack_incremental([segment.text], method, freq, confidence=None)
+    decoded = caesar_engine.caesar_cipher(segment.text[:preview], -result.best_shift)
+    if isinstance(decoded, bytes):
+        decoded = decoded.decode('utf-8', errors='replace')
+    return SegmentResult(segment.index, segment.start, segment.end, result.best_shift,
+                         result.scores[result.best_shift], result.confidence, result.letters,
+                         decoded, 1)
+
+
+def crack_batch(batch, method='distance', freq=caesar_engine.ENGLISH_FREQ):
+    """Crack a list of segments; runs in a worker process"""
+    return [crack_segment(segment, method, freq) for segment in batch]
+
+
+def iter_batches(segments, batch_size=BATCH_SIZE):
+    """Group segments into lists of about batch_size characters"""
+    batch = []
+    size = 0
+    for segment in segments:
+        batch.append(segment)
+        size += len(segment.text)
+        if size >= batch_size:
+            yield batch
+            batch = []
+            size = 0
+    if batch:
+        yield batch
+
+
+def merge_adjacent(results):
+    """Merge runs of consecutive results that share a shift
+
+    Blank segments in between do not break a run. A merged result spans
+    its parts, adds up their letters, keeps the lowest confidence and the
+    first preview, and has no score, since scores of separately cracked
+    segments do not combine.
+    """
+    pending = None
+    for result in results:
+        if pending is not None and result.best_shift == pending.best_shift:
+            pending = pending._replace(end=result.end, score=None,
+                                       confidence=min(pending.confidence, result.confidence),
+                                       letters=pending.letters + result.letters,
+                                       segments=pending.segments + result.segments)
+            continue
+        if pending is not None:
+            yield pending
+        pending = result
+    if pending is not None:
+        yield pending
+
+
+def crack_segments(segments, method='distance', freq=caesar_engine.ENGLISH_FREQ,
+                   workers=None, merge=False, batch_size=BATCH_SIZE):
+    """Crack every segment, yielding SegmentResults in input order
+
+    Batches are spread over a process pool (workers == 1 stays in-process)
+    with a bounded number in flight, so memory stays flat on large inputs.
+    """
+    work = functools.partial(crack_batch, method=method, freq=freq)
+    batches = iter_batches(segments, batch_size)
+    if workers == 1:
+        results = (result for batch in map(work, batches) for result in batch)
+    else:
+        results = _ordered_pool_map(work, batches, workers)
+    return merge_adjacent(results) if merge else results
+
+
+def _ordered_pool_map(work, batches, workers):
+    in_flight = (workers or os.cpu_count() or 1) * 4
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for batch in batches:
+            pending.append(executor.submit(work, batch))
+            if len(pending) >= in_flight:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Local decoding service - the engine over HTTP/1.1 on TCP or a Unix socket
+POST JSON to /decode, /crack or /scan; GET /health and /metrics.
+Small concurrent crack and scan requests are micro-batched into one
+histogram and scoring call; large ones go to a process pool. Requests are
+rejected with 503 once too many are in flight, and time out with 504.
+
+Examples:
+    caesar_service.py --port 8765
+    caesar_service.py --unix /tmp/caesar.sock --workers 4
+    curl -s localhost:8765/crack -d '{"text": "Khoor zruog", "method": "quadgram"}'
+    curl -s --unix-socket /tmp/caesar.sock http:/x/decode -d '{"text": "Khoor", "shift": 3}'
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import caesar_engine
+from caesar_metrics import METRICS
+
+ENDPOINTS = ('decode', 'crack', 'scan')
+
+DEFAULT_PORT = 8765
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_MAX_PENDING = 256
+
+# Requests at least this long skip batching and run in the process pool
+LARGE_REQUEST = 256 << 10
+MAX_BODY = 64 << 20
+
+# Longest request or header line; longer ones get 414 or 431
+MAX_LINE = 64 << 10
+
+# Small requests wait this long (seconds) for company before being scored
+BATCH_DELAY = 0.002
+BATCH_MAX = 64
+
+# Idle keep-alive connections are closed after this many seconds
+IDLE_TIMEOUT = 60.0
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            413: 'Payload Too Large', 414: 'URI Too Long',
+            431: 'Request Header Fields Too Large', 500: 'Internal Server Error',
+            503: 'Service Unavailable', 504: 'Gateway Timeout'}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_request(endpoint, payload):
+    """Validate a request body; returns (text, method, options)"""
+    if endpoint not in ENDPOINTS:
+        raise HTTPError(404, f"Unknown endpoint: /{endpoint}")
+    if not isinstance(payload, dict) or not isinstance(payload.get('text'), str):
+        raise HTTPError(400, "Body must be a JSON object with a 'text' string")
+    method = payload.get('method', 'distance')
+    if method not in caesar_engine.METHODS:
+        raise HTTPError(400, f"Unknown scoring method: {method}")
+    if endpoint == 'decode' and not isinstance(payload.get('shift'), int):
+        raise HTTPError(400, "/decode needs an integer 'shift'")
+    options = caesar_engine.DecodeOptions(bool(payload.get('preserve_case', True)),
+                                          bool(payload.get('preserve_spaces', True)))
+    return payload['text'], method, options
+
+
+def response_record(endpoint, text, result, options):
+    """JSON-ready response for a crack or scan result"""
+    ranking = caesar_engine.rank_shifts(result.scores)
+    record = {'best_shift': result.best_shift,
+              'score': result.scores[result.best_shift],
+              'margin': result.scores[ranking[0]] - result.scores[ranking[1]],
+              'confidence': result.confidence,
+              'letters': result.letters,
+              'examined': result.examined}
+    if endpoint == 'scan':
+        record['scores'] = result.scores
+    else:
+        record['text'] = caesar_engine.caesar_cipher(text, -result.best_shift, options)
+    return record
+
+
+def run_request(endpoint, payload):
+    """Handle one request start to finish; runs in a worker process for large inputs"""
+    text, method, options = parse_request(endpoint, payload)
+    if endpoint == 'decode':
+        return {'text': caesar_engine.caesar_cipher(text, -payload['shift'], options)}
+    if endpoint == 'crack':
+        result = caesar_engine.crack_text(
+            text, method, confidence=payload.get('confidence', caesar_engine.DEFAULT_CONFIDENCE))
+    else:
+        result = caesar_engine.crack_incremental([text], method, confidence=None)
+    return response_record(endpoint, text, result, options)
+
+
+class MicroBatcher:
+    """Gathers small texts for a moment and cracks them with one crack_many call"""
+
+    def __init__(self, delay=BATCH_DELAY, max_size=BATCH_MAX):
+        self.delay = delay
+        self.max_size = max_size
+        self._pending = {}  # method -> [(text, future), ...]
+
+    async def crack(self, text, method):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.setdefault(method, [])
+        batch.append((text, future))
+        if len(batch) >= self.max_size:
+            self._flush(method, batch)
+        elif len(batch) == 1:
+            loop.call_later(self.delay, self._flush, method, batch)
+        return await future
+
+    def _flush(self, method, batch):
+        if self._pending.get(method) is not batch:
+            return  # already flushed for being full
+        del self._pending[method]
+        METRICS.count('service_batches')
+        METRICS.count('service_batched_requests', len(batch))
+        loop = asyncio.get_running_loop()
+        work = loop.run_in_executor(None, caesar_engine.crack_many,
+                                    [text for text, _ in batch], method)
+        work.add_done_callback(lambda done: self._deliver(batch, done))
+
+    @staticmethod
+    def _deliver(batch, done):
+        error = done.exception()
+        results = [error] * len(batch) if error else done.result()
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue  # the request timed out meanwhile
+            if error:
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+class CaesarService:
+    """Request handling, batching, backpressure and timeouts"""
+
+    def __init__(self, workers=None, max_pending=DEFAULT_MAX_PENDING, timeout=DEFAULT_TIMEOUT,
+                 large_request=LARGE_REQUEST, batch_delay=BATCH_DELAY, batch_max=BATCH_MAX):
+        self.timeout = timeout
+        self.large_request = large_request
+        self.batcher = MicroBatcher(batch_delay, batch_max)
+        # Forked workers would inherit open client sockets (and locks held
+        # by batch threads), so start them from a clean forkserver instead
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        self.pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        self.max_pending = max_pending
+        self.pending = 0
+        # Large requests queue for a pool slot instead of piling up in the pool
+        self._pool_slots = asyncio.Semaphore((workers or os.cpu_count() or 1) * 2)
+
+    async def handle(self, endpoint, payload):
+        """Run one request; returns (status, JSON-ready body)"""
+        if self.pending >= self.max_pending:
+            METRICS.count('service_rejected')
+            return 503, {'error': "Too many requests in flight, retry later"}
+        self.pending += 1
+        try:
+            timeout = min(float(payload.get('timeout', self.timeout)), self.timeout)
+            return 200, await asyncio.wait_for(self._run(endpoint, payload), timeout)
+        except HTTPError as e:
+            return e.status, {'error': str(e)}
+        except asyncio.TimeoutError:
+            METRICS.count('service_timeouts')
+            return 504, {'error': "Request timed out"}
+        except (TypeError, ValueError) as e:
+            return 400, {'error': str(e)}
+        finally:
+            self.pending -= 1
+
+    async def _run(self, endpoint, payload):
+        text, method, options = parse_request(endpoint, payload)
+        METRICS.count('service_requests')
+        loop = asyncio.get_running_loop()
+        if len(text) >= self.large_request:
+            async with self._pool_slots:
+                return await loop.run_in_executor(self.pool, run_request, endpoint, payload)
+        if endpoint == 'decode' or (endpoint == 'crack' and 'confidence' in payload):
+            # Off the event loop, like batched cracks, so the timeout applies
+            return await loop.run_in_executor(None, run_request, endpoint, payload)
+        result = await self.batcher.crack(text, method)
+        return response_record(endpoint, text, result, options)
+
+    async def serve_connection(self, reader, writer):
+        """Serve HTTP/1.1 requests on one connection until it closes"""
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(read_request(reader), IDLE_TIMEOUT)
+                except HTTPError as e:
+                    write_response(writer, e.status, {'error': str(e)}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                verb, path, headers, body = request
+                status, response = await self.dispatch(verb, path, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                write_response(writer, status, response, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, verb, path, body):
+        path = path.split('?', 1)[0].strip('/')
+        if verb == 'GET' and path == 'health':
+            return 200, {'status': 'ok', 'pending': self.pending}
+        if verb == 'GET' and path == 'metrics':
+            return 200, METRICS.snapshot()
+        if path not in ENDPOINTS:
+            return 404, {'error': f"Unknown endpoint: /{path}"}
+        if verb != 'POST':
+            return 405, {'error': f"/{path} only accepts POST"}
+        try:
+            payload = json.loads(body or b'{}')
+        except ValueError as e:
+            return 400, {'error': f"Invalid JSON: {e}"}
+        if not isinstance(payload, dict):
+            return 400, {'error': "Body must be a JSON object"}
+        return await self.handle(path, payload)
+
+    async def start(self, host='127.0.0.1', port=DEFAULT_PORT, unix_path=None):
+        """Start listening; returns the asyncio server"""
+        if unix_path:
+            if os.path.exists(unix_path):
+                os.unlink(unix_path)  # left behind by a previous run
+            return await asyncio.start_unix_server(self.serve_connection, unix_path,
+                                                   limit=MAX_LINE)
+        return await asyncio.start_server(self.serve_connection, host, port, limit=MAX_LINE)
+
+    def close(self):
+        self.pool.shutdown(wait=False)
+
+
+async def read_line(reader, status):
+    """readline(), answering status when the line exceeds the reader's limit"""
+    try:
+        return await reader.readline()
+    except ValueError:
+        raise HTTPError(status, f"Request and header lines are limited to {MAX_LINE} bytes")
+
+
+async def read_request(reader):
+    """Read one HTTP/1.1 request; returns (verb, path, headers, body) or None at EOF"""
+    line = await read_line(reader, 414)
+    if not line.strip():
+        return None
+    try:
+        verb, path, _ = line.decode('latin-1').split(' ', 2)
+    except ValueError:
+        raise HTTPError(400, "Malformed request line")
+
+    headers = {}
+    while True:
+        line = await read_line(reader, 431)
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise HTTPError(400, "Invalid Content-Length")
+    if length > MAX_BODY:
+        raise HTTPError(413, f"Request bodies are limited to {MAX_BODY} bytes")
+    body = await reader.readexactly(length) if length else b''
+    return verb.upper(), path, headers, body
+
+
+def write_response(writer, status, body, keep_alive=True):
+    data = json.dumps(body).encode('utf-8')
+    head = (f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n")
+    if status == 503:
+        head += "Retry-After: 1\r\n"
+    writer.write(head.encode('latin-1') + b'\r\n' + data)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Local Caesar decoding service")
+    parser.add_argument('--host', default='127.0.0.1', help="address to bind (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help=f"TCP port (default: {DEFAULT_PORT})")
+    parser.add_argument('--unix', metavar='PATH', help="listen on a Unix socket instead of TCP")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="processes for large requests (default: CPU count)")
+    parser.add_argument('--max-pending', type=int, default=DEFAULT_MAX_PENDING,
+                        help=f"requests in flight before answering 503 (default: {DEFAULT_MAX_PENDING})")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help=f"longest a request may take, in seconds (default: {DEFAULT_TIMEOUT})")
+    parser.add_argument('--large', type=int, default=LARGE_REQUEST,
+                        help=f"texts this long go to the process pool (default: {LARGE_REQUEST})")
+    parser.add_argument('--batch-delay', type=float, default=BATCH_DELAY * 1000,
+                        help=f"milliseconds small requests wait to be batched (default: {BATCH_DELAY * 1000:g})")
+    parser.add_argument('--batch-max', type=int, default=BATCH_MAX,
+                        help=f"largest micro-batch (default: {BATCH_MAX})")
+    return parser
+
+
+async def serve(args):
+    service = CaesarService(args.workers, args.max_pending, args.timeout, args.large,
+                            args.batch_delay / 1000, args.batch_max)
+    server = await service.start(args.host, args.port, args.unix)
+    where = args.unix or f"http://{args.host}:{args.port}"
+    print(f"Caesar service listening on {where}", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
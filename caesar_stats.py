@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Text statistics collected in one pass - for the Analysis tab and batch reports
+TextStats counts every character once. Letters, digits, whitespace,
+punctuation, letter frequencies and the index of coincidence are all
+derived from those counts, and update() hands back the letter histogram
+of each chunk, so a crack fed from the same chunks needs no second pass.
+Counts are kept per character, so text can be added or removed as it is
+appended or edited.
+
+Examples:
+    stats = TextStats(text)
+    result = caesar_engine.crack_incremental([text], stats=TextStats())
+    stats.replace(old_line, new_line)
+"""
+
+import re
+import string
+from collections import Counter
+
+import caesar_engine
+import caesar_stream
+from caesar_metrics import METRICS, timed
+
+CLASSES = ('letters', 'digits', 'whitespace', 'punctuation')
+
+_NON_ASCII = re.compile('[^\x00-\x7f]+')
+
+
+def char_class(char):
+    """Class of a str character or a byte value; non-ASCII bytes are punctuation"""
+    if not isinstance(char, str):
+        char = chr(char) if char < 128 else ''
+    if char.isalpha():
+        return 'letters'
+    if char.isdigit():
+        return 'digits'
+    if char.isspace():
+        return 'whitespace'
+    return 'punctuation'
+
+
+def _numpy_counts(text):
+    """Character counts from np.bincount; a Counter only sees the non-ASCII characters
+
+    UTF-8 encodes ASCII characters as themselves and everything else with
+    bytes of 128 and up, so the first 128 bins of the byte histogram are
+    exact ASCII character counts.
+    """
+    histogram = caesar_engine.numpy_backend().byte_histogram(text)
+    if not isinstance(text, str):
+        return Counter({value: int(count) for value, count in enumerate(histogram) if count})
+    counts = Counter({chr(value): int(count) for value, count in enumerate(histogram[:128])
+                      if count})
+    if not text.isascii():
+        counts.update(''.join(_NON_ASCII.findall(text)))
+    return counts
+
+
+class TextStats:
+    """Character counts of a str or bytes text, updated chunk by chunk"""
+
+    def __init__(self, text=None):
+        self.counts = Counter()
+        self.length = 0
+        self.is_bytes = False
+        self._classes = None
+        if text:
+            self.update(text)
+
+    def __repr__(self):
+        return f"TextStats(length={self.length}, letters={self.letters})"
+
+    def __add__(self, other):
+        merged = TextStats()
+        merged.counts = self.counts + other.counts
+        merged.length = self.length + other.length
+        merged.is_bytes = self.is_bytes or other.is_bytes
+        return merged
+
+    @timed('histogram')
+    def update(self, text, backend='auto'):
+        """Count a chunk of text and return its 26-letter histogram"""
+        METRICS.count('histogram_chars', len(text))
+        if caesar_engine.use_numpy(text, backend):
+            counts = _numpy_counts(text)
+        else:
+            counts = Counter(text)
+        self.counts.update(counts)
+        self.length += len(text)
+        self.is_bytes = not isinstance(text, str)
+        self._classes = None
+        pairs = (caesar_engine.BYTE_LETTER_PAIRS if self.is_bytes
+                 else caesar_engine.LETTER_PAIRS)
+        return [counts[lower] + counts[upper] for lower, upper in pairs]
+
+    def remove(self, text):
+        """Forget a chunk of text that was counted before"""
+        self.counts.subtract(text)
+        self.counts = +self.counts  # drop characters no longer present
+        self.length -= len(text)
+        self._classes = None
+
+    def replace(self, old, new):
+        """Account for an edit that replaced old with new"""
+        self.remove(old)
+        self.update(new)
+
+    def class_counts(self):
+        """{class: count} for the four CLASSES, from the distinct characters only"""
+        if self._classes is None:
+            classes = dict.fromkeys(CLASSES, 0)
+            for char, count in self.counts.items():
+                classes[char_class(char)] += count
+            self._classes = classes
+        return self._classes
+
+    @property
+    def letters(self):
+        """All letters, including non-ASCII ones"""
+        return self.class_counts()['letters']
+
+    @property
+    def digits(self):
+        return self.class_counts()['digits']
+
+    @property
+    def whitespace(self):
+        return self.class_counts()['whitespace']
+
+    @property
+    def punctuation(self):
+        """Everything that is not a letter, digit or whitespace"""
+        return self.class_counts()['punctuation']
+
+    def letter_histogram(self):
+        """Case-insensitive counts of the 26 ASCII letters, a to z"""
+        pairs = (caesar_engine.BYTE_LETTER_PAIRS if self.is_bytes
+                 else caesar_engine.LETTER_PAIRS)
+        return [self.counts[lower] + self.counts[upper] for lower, upper in pairs]
+
+    def top_letters(self, n=10):
+        """The n most frequent ASCII letters as (letter, count) pairs"""
+        histogram = Counter({letter: count for letter, count
+                             in zip(string.ascii_lowercase, self.letter_histogram()) if count})
+        return histogram.most_common(n)
+
+    def index_of_coincidence(self):
+        """Probability that two letters drawn from the text are the same letter
+
+        About 0.066 for English and 0.038 for uniformly random letters; a
+        Caesar shift does not change it. None below two letters.
+        """
+        histogram = self.letter_histogram()
+        total = sum(histogram)
+        if total < 2:
+            return None
+        return sum(n * (n - 1) for n in histogram) / (total * (total - 1))
+
+    def summary(self, top=10):
+        """JSON-ready report"""
+        return {'length': self.length, **self.class_counts(),
+                'index_of_coincidence': self.index_of_coincidence(),
+                'top_letters': self.top_letters(top)}
+
+
+def file_stats(path, chunk_size=caesar_stream.DEFAULT_CHUNK_SIZE):
+    """TextStats of a file's bytes, read chunk by chunk"""
+    stats = TextStats()
+    for chunk in caesar_stream.iter_chunks(path, chunk_size):
+        stats.update(chunk)
+    return stats
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Streaming file decoding - constant memory, for inputs larger than RAM
+Pass 1 builds the letter histogram, pass 2 writes the decoded bytes.
+Files are processed as raw bytes: only ASCII letters change, so UTF-8
+(or any ASCII-compatible encoding) survives chunk boundaries intact.
+"""
+
+import mmap
+import os
+import time
+
+import caesar_engine
+from caesar_metrics import METRICS
+
+DEFAULT_CHUNK_SIZE = 4 << 20
+
+
+def _read(file, size):
+    with METRICS.stage('file_read'):
+        chunk = file.read(size)
+    METRICS.count('bytes_read', len(chunk))
+    return chunk
+
+
+def iter_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE, use_mmap=False):
+    """Yield the file at path as successive byte chunks"""
+    with open(path, 'rb') as file:
+        if use_mmap and os.fstat(file.fileno()).st_size > 0:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for start in range(0, len(mapped), chunk_size):
+                    with METRICS.stage('file_read'):
+                        chunk = mapped[start:start + chunk_size]
+                    METRICS.count('bytes_read', len(chunk))
+                    yield chunk
+        else:
+            while True:
+                chunk = _read(file, chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+
+def iter_views(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield the file as memoryviews of one reused buffer, filled with readinto
+
+    Nothing is allocated per chunk, but each view is only valid until the
+    next one is yielded.
+    """
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(path, 'rb', buffering=0) as file:
+        while True:
+            with METRICS.stage('file_read'):
+                count = file.readinto(buffer)
+            if not count:
+                break
+            METRICS.count('bytes_read', count)
+            yield view[:count]
+
+
+def iter_growing_chunks(path, first_size=caesar_engine.FIRST_SAMPLE_SIZE,
+                        chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield the file as chunks that double in size up to chunk_size"""
+    size = first_size
+    with open(path, 'rb') as file:
+        while True:
+            chunk = _read(file, size)
+            if not chunk:
+                break
+            yield chunk
+            size = min(size * 2, chunk_size)
+
+
+class Progress:
+    """Turns byte counts into (done, total, bytes_per_second) callbacks"""
+
+    def __init__(self, total, callback=None):
+        self.total = total
+        self.callback = callback
+        self.done = 0
+        self.started = time.perf_counter()
+
+    @property
+    def rate(self):
+        elapsed = time.perf_counter() - self.started
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def advance(self, count):
+        self.done += count
+        if self.callback is not None:
+            self.callback(self.done, self.total, self.rate)
+
+    def track(self, chunks):
+        """Pass chunks through, advancing as each one is consumed"""
+        for chunk in chunks:
+            yield chunk
+            self.advance(len(chunk))
+
+
+def decode_file(source, destination, shift, options=caesar_engine.DEFAULT_OPTIONS,
+                chunk_size=DEFAULT_CHUNK_SIZE, use_mmap=False, progress=None):
+    """Second pass: stream source decoded with shift into destination
+
+    With preserve_spaces off only ASCII whitespace is removed.
+    Returns the number of bytes written.
+    """
+    tracker = Progress(os.path.getsize(source), progress)
+    written = 0
+    with open(destination, 'wb') as out:
+        for chunk in iter_chunks(source, chunk_size, use_mmap):
+            decoded = caesar_engine.caesar_cipher(chunk, shift, options)
+            out.write(decoded)
+            written += len(decoded)
+            tracker.advance(len(chunk))
+    return written
+
+
+def crack_file(source, destination=None, options=caesar_engine.DEFAULT_OPTIONS,
+               method='distance', freq=caesar_engine.ENGLISH_FREQ,
+               chunk_size=DEFAULT_CHUNK_SIZE, use_mmap=False, progress=None,
+               confidence=None, stats=None):
+    """Find the best shift of a file and optionally stream the decoded file out
+
+    With a confidence the file is sampled in growing chunks and the search
+    stops early (see caesar_engine.crack_incremental). Returns a CrackResult;
+    its examined field counts the bytes read to pick the shift. A
+    caesar_stats.TextStats given as stats counts those same bytes.
+    """
+    tracker = Progress(os.path.getsize(source), progress)
+    if confidence is None:
+        chunks = iter_chunks(source, chunk_size, use_mmap)
+    else:
+        chunks = iter_growing_chunks(source, chunk_size=chunk_size)
+    result = caesar_engine.crack_incremental(tracker.track(chunks), method, freq, confidence,
+                                             stats=stats)
+
+    if destination is not None:
+        decode_file(source, destination, -result.best_shift, options, chunk_size, use_mmap,
+                    progress)
+
+    return result
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Crack cache - results are only shared between identical requests
+Run with: python -m pytest test_cache.py (or python -m unittest test_cache)
+"""
+
+import os
+import tempfile
+import unittest
+
+import caesar_cache
+import caesar_engine
+from caesar_bench import english_text
+
+
+class CrackCacheKeyTest(unittest.TestCase):
+    TEXT = caesar_engine.caesar_cipher(english_text(50000, 4) + " Ünïcödé ✓", 6)
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.directory.name, 'source.txt')
+        with open(self.source, 'w', encoding='utf-8') as file:
+            file.write(self.TEXT)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def counting_crack(self, calls, method, confidence):
+        def crack(text):
+            calls.append((method, confidence))
+            return caesar_engine.crack_text(text, method, confidence=confidence)
+        return crack
+
+    def test_method_and_confidence_get_their_own_entries(self):
+        cache = caesar_cache.CrackCache()
+        calls = []
+        requests = [(method, confidence) for method in ('distance', 'chi2')
+                    for confidence in (None, caesar_engine.DEFAULT_CONFIDENCE)]
+        for _ in range(2):
+            for method, confidence in requests:
+                result = cache.crack(self.TEXT, method, confidence=confidence,
+                                     crack=self.counting_crack(calls, method, confidence))
+                with self.subTest(method=method, confidence=confidence):
+                    self.assertEqual(result,
+                                     caesar_engine.crack_text(self.TEXT, method,
+                                                              confidence=confidence))
+        # Every request missed once, then hit
+        self.assertEqual(calls, requests)
+        self.assertEqual(len(cache.memory), len(requests))
+
+    def test_text_and_file_results_are_kept_apart(self):
+        cache = caesar_cache.CrackCache()
+        for _ in range(2):
+            text_result = cache.crack(self.TEXT, confidence=None)
+            file_result = cache.crack_file(self.source, confidence=None)
+            # examined counts characters for text and bytes for files
+            self.assertEqual(text_result.examined, len(self.TEXT))
+            self.assertEqual(file_result.examined, len(self.TEXT.encode('utf-8')))
+        keys = list(cache.memory._entries)
+        self.assertEqual(len(keys), 2)
+        self.assertTrue(keys[0].startswith('crack-text:'))
+        self.assertTrue(keys[1].startswith('crack-file:'))
+
+    def test_results_persist_across_instances(self):
+        path = os.path.join(self.directory.name, 'cache.db')
+        cache = caesar_cache.CrackCache(path=path)
+        expected = cache.crack(self.TEXT, 'chi2')
+        cache.close()
+
+        cache = caesar_cache.CrackCache(path=path)
+        calls = []
+        self.assertEqual(cache.crack(self.TEXT, 'chi2', crack=calls.append), expected)
+        self.assertEqual(calls, [])
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Engine behaviour - histogram scoring, early exit and the line decoder
+Run with: python -m pytest test_engine.py (or python -m unittest test_engine)
+"""
+
+import unittest
+
+import caesar_engine
+from caesar_bench import english_text
+
+
+def baseline_score(text, freq=caesar_engine.ENGLISH_FREQ):
+    """The original GUI score: absolute frequency distance of the decoded text"""
+    counts = {}
+    for char in text.lower():
+        if char.isalpha():
+            counts[char] = counts.get(char, 0) + 1
+    total = sum(counts.values())
+    if total == 0:
+        return 0
+    distance = sum(abs(count / total * 100 - freq.get(letter, 0.01))
+                   for letter, count in counts.items())
+    return 1000 / (distance + 1)
+
+
+class ShiftScoresTest(unittest.TestCase):
+
+    def test_distance_matches_scoring_every_decoding(self):
+        for length, seed in ((1, 1), (30, 2), (2000, 3)):
+            text = caesar_engine.caesar_cipher(english_text(length, seed) + " Zz!", 11)
+            scores = caesar_engine.shift_scores(caesar_engine.letter_histogram(text), 'distance')
+            for shift in range(26):
+                with self.subTest(length=length, shift=shift):
+                    self.assertAlmostEqual(
+                        scores[shift], baseline_score(caesar_engine.caesar_cipher(text, -shift)),
+                        places=9)
+
+    def test_text_without_letters_scores_zero(self):
+        self.assertEqual(caesar_engine.shift_scores([0] * 26, 'distance'), [0] * 26)
+
+
+class CrackIncrementalTest(unittest.TestCase):
+    TEXT = caesar_engine.caesar_cipher(english_text(200000, 9), 17)
+
+    def test_stops_once_confident(self):
+        samples = list(caesar_engine.iter_samples(self.TEXT))
+        result = caesar_engine.crack_incremental(iter(samples))
+        self.assertEqual(result.best_shift, 17)
+        self.assertGreaterEqual(result.confidence, caesar_engine.DEFAULT_CONFIDENCE)
+        self.assertLess(result.examined, len(self.TEXT))
+        # examined counts whole samples, from the first one on
+        self.assertIn(result.examined, [sum(map(len, samples[:n])) for n in range(1, len(samples))])
+        examined = self.TEXT[:result.examined]
+        self.assertEqual(result.letters, sum(caesar_engine.letter_histogram(examined)))
+
+    def test_reads_everything_without_confidence(self):
+        result = caesar_engine.crack_incremental(caesar_engine.iter_samples(self.TEXT),
+                                                 confidence=None)
+        self.assertEqual(result.best_shift, 17)
+        self.assertEqual(result.examined, len(self.TEXT))
+
+    def test_short_text_is_read_whole(self):
+        text = caesar_engine.caesar_cipher("the quick brown fox", 3)
+        result = caesar_engine.crack_text(text)
+        self.assertEqual(result.examined, len(text))
+
+
+class LineDecoderTest(unittest.TestCase):
+    LINES = [f"line {i} Hello" for i in range(20)]
+
+    def decoder(self):
+        decoder = caesar_engine.LineDecoder(3)
+        decoder.update('\n'.join(self.LINES))
+        return decoder
+
+    def check_edit(self, new_lines):
+        decoder = self.decoder()
+        first, last, count = decoder.update('\n'.join(new_lines))
+        # Splicing the reported block into the old lines gives the new ones
+        self.assertEqual(self.LINES[:first] + new_lines[first:first + count] + self.LINES[last:],
+                         new_lines)
+        self.assertGreaterEqual(count, 1)
+        self.assertEqual(decoder.get_lines(0, len(decoder)),
+                         caesar_engine.caesar_cipher('\n'.join(new_lines), 3).split('\n'))
+        return first, last, count
+
+    def test_edited_line(self):
+        lines = list(self.LINES)
+        lines[7] = "edited"
+        self.assertEqual(self.check_edit(lines), (7, 8, 1))
+
+    def test_inserted_lines(self):
+        first, last, count = self.check_edit(self.LINES[:5] + ["new", "lines"] + self.LINES[5:])
+        self.assertEqual(count - (last - first), 2)
+
+    def test_deleted_lines(self):
+        first, last, count = self.check_edit(self.LINES[:5] + self.LINES[9:])
+        self.assertEqual(count - (last - first), -4)
+
+    def test_edits_at_both_ends(self):
+        self.check_edit(["new first"] + self.LINES[1:])
+        self.check_edit(self.LINES[:-1] + ["new last", ""])
+        self.check_edit([""])
+
+
+class LineWidthTest(unittest.TestCase):
+    TEXT = "short\n" + "x" * 5000 + "Hello\n\nlast line"
+
+    def test_line_decoder_decodes_only_the_width(self):
+        decoder = caesar_engine.LineDecoder(3)
+        decoder.update(self.TEXT)
+        full = decoder.get_lines(0, len(decoder))
+        for width in (0, 1, 5, 80, 10000):
+            with self.subTest(width=width):
+                self.assertEqual(decoder.get_lines(0, len(decoder), width),
+                                 [line[:width] for line in full])
+        self.assertEqual(decoder.get_lines(1, 3, 4), ["aaaa", ""])
+
+    def test_wrapped_lines_cut_each_row(self):
+        view = caesar_engine.WrappedLines("abcdefghij" * 5, width=12)
+        self.assertEqual(len(view), 5)
+        self.assertEqual(view.get_lines(0, 10), [view.source[i:i + 12] for i in range(0, 50, 12)])
+        self.assertEqual(view.get_lines(1, 3, 4), ["cdef", "efgh"])
+        self.assertEqual(view.get_lines(0, 1, 100), [view.source[:12]])
+
+
+if __name__ == "__main__":
+    unittest.main()
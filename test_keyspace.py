@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Keyspace search - every key round-trips and crack_bytes recovers it
+Run with: python -m pytest test_keyspace.py (or python -m unittest test_keyspace)
+"""
+
+import unittest
+
+import caesar_keyspace
+from caesar_bench import english_text
+
+
+class KeyspaceTest(unittest.TestCase):
+    PLAIN = english_text(2000, 3).encode()
+
+    def test_every_key_round_trips_every_byte(self):
+        data = bytes(range(256))
+        for cipher in caesar_keyspace.CIPHERS:
+            for key in caesar_keyspace.keys(cipher):
+                encrypted = data.translate(caesar_keyspace.encode_table(key))
+                self.assertEqual(encrypted.translate(caesar_keyspace.decode_table(key)), data)
+
+    def test_crack_bytes_recovers_the_key(self):
+        keys = (caesar_keyspace.keys('caesar') + [caesar_keyspace.ATBASH]
+                + caesar_keyspace.keys('rot47')[::7] + caesar_keyspace.keys('affine')[5::23])
+        for key in keys:
+            with self.subTest(key=key):
+                encrypted = self.PLAIN.translate(caesar_keyspace.encode_table(key))
+                result = caesar_keyspace.crack_bytes(encrypted)
+                # Affine keys with a == 1 and ROT47 0 decode like Caesar keys and
+                # are reported as those
+                self.assertEqual(caesar_keyspace.decode_table(result.key),
+                                 caesar_keyspace.decode_table(key))
+                if not (key.cipher == 'affine' and key.a == 1) and key != ('rot47', 1, 0):
+                    self.assertEqual(result.key, key)
+                self.assertEqual(caesar_keyspace.translate(memoryview(encrypted),
+                                                           caesar_keyspace.decode_table(result.key)),
+                                 self.PLAIN)
+
+
+if __name__ == "__main__":
+    unittest.main()
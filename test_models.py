@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Language models - saved model files load back unchanged
+Run with: python -m pytest test_models.py (or python -m unittest test_models)
+"""
+
+import os
+import tempfile
+import unittest
+
+import caesar_engine
+import caesar_models
+from caesar_bench import english_text
+
+
+class ModelFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'en.lm')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_save_then_load_round_trips(self):
+        model = caesar_models.build_model('en', [english_text(20000, 8), b"QUICK zebra jumps"])
+        caesar_models.save_model(model, self.path)
+        loaded = caesar_models.load_model(self.path)
+
+        self.assertEqual(loaded.name, 'en')
+        self.assertEqual(loaded.path, self.path)
+        # Values are stored as float32
+        self.assertAlmostEqual(loaded.quadgrams.floor, model.quadgrams.floor, places=4)
+        self.assertEqual(list(loaded.quadgrams.table), list(model.quadgrams.table))
+        self.assertEqual(sorted(loaded.freq), sorted(model.freq))
+        for letter, percent in model.freq.items():
+            self.assertAlmostEqual(loaded.freq[letter], percent, places=4)
+
+        text = caesar_engine.caesar_cipher(english_text(500, 2), 9)
+        self.assertEqual(loaded.quadgrams.score(text), model.quadgrams.score(text))
+
+    def test_rejects_other_files(self):
+        with open(self.path, 'wb') as file:
+            file.write(b"not a model")
+        with self.assertRaises(caesar_models.ModelError):
+            caesar_models.load_model(self.path)
+
+    def test_rejects_long_names(self):
+        model = caesar_models.build_model('a' * 17, ["some letters"])
+        with self.assertRaises(caesar_models.ModelError):
+            caesar_models.save_model(model, self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
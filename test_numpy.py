@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+NumPy backend parity - decodes, histograms and batch scores match the Python path
+Run with: python -m pytest test_numpy.py (or python -m unittest test_numpy)
+"""
+
+import unittest
+
+import caesar_engine
+from caesar_bench import english_text
+
+HAS_NUMPY = caesar_engine.numpy_backend() is not None
+
+
+@unittest.skipUnless(HAS_NUMPY, "numpy is not installed")
+class NumpyBackendTest(unittest.TestCase):
+    TEXT = english_text(5000, 7) + " Ünïcödé café ✓ 日本語 ZZz\r\n\t~"
+
+    def test_decode_is_identical(self):
+        for data in (self.TEXT, self.TEXT.encode(), bytearray(self.TEXT.encode())):
+            for shift in range(-26, 27, 5):
+                for options in (caesar_engine.DEFAULT_OPTIONS,
+                                caesar_engine.DecodeOptions(preserve_case=False),
+                                caesar_engine.DecodeOptions(preserve_spaces=False)):
+                    with self.subTest(type=type(data).__name__, shift=shift, options=options):
+                        expected = caesar_engine.caesar_cipher(data, shift, options, 'python')
+                        actual = caesar_engine.caesar_cipher(data, shift, options, 'numpy')
+                        self.assertEqual(type(actual), type(expected))
+                        self.assertEqual(actual, expected)
+
+    def test_histograms_are_identical(self):
+        for data in (self.TEXT, self.TEXT.encode()):
+            self.assertEqual(caesar_engine.letter_histogram(data, 'numpy'),
+                             caesar_engine.letter_histogram(data, 'python'))
+
+    def test_batch_scores_match(self):
+        histograms = [caesar_engine.letter_histogram(english_text(n, n)) for n in (1, 40, 900)]
+        histograms.append([0] * 26)
+        for method in caesar_engine.SCORING_METHODS:
+            expected = caesar_engine.batch_scores(histograms, method, backend='python')
+            actual = caesar_engine.batch_scores(histograms, method, backend='numpy')
+            for want, got in zip(expected, actual):
+                for a, b in zip(want, got):
+                    self.assertAlmostEqual(a, b, places=9)
+
+
+if __name__ == "__main__":
+    unittest.main()
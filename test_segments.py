@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Segmenting - chunked input splits exactly like the whole text
+Run with: python -m pytest test_segments.py (or python -m unittest test_segments)
+"""
+
+import unittest
+
+import caesar_segments
+
+SEGMENT_TEXT = ("first line\r\nsecond line\n\n\nthird --- fourth\n  \t\n"
+                "fifth---sixth\r\n\r\nlast line without newline")
+
+SEGMENT_CASES = [('line', None, 7), ('paragraph', None, 7), ('delimiter', '---', 7),
+                 ('window', None, 7), ('window', None, 1)]
+
+
+class IterSegmentsTest(unittest.TestCase):
+
+    def check_all_chunkings(self, text):
+        for mode, delimiter, window in SEGMENT_CASES:
+            expected = list(caesar_segments.split_text(text, mode, delimiter, window))
+            self.assertTrue(expected)
+            for size in range(1, len(text) + 1):
+                chunks = [text[i:i + size] for i in range(0, len(text), size)]
+                with self.subTest(mode=mode, window=window, chunk_size=size):
+                    self.assertEqual(
+                        list(caesar_segments.iter_segments(chunks, mode, delimiter, window)),
+                        expected)
+
+    def test_str_chunks_match_whole_text(self):
+        self.check_all_chunkings(SEGMENT_TEXT)
+
+    def test_bytes_chunks_match_whole_text(self):
+        self.check_all_chunkings(SEGMENT_TEXT.encode())
+
+    def test_offsets_point_into_the_text(self):
+        for segment in caesar_segments.split_text(SEGMENT_TEXT, 'paragraph'):
+            self.assertEqual(SEGMENT_TEXT[segment.start:segment.end], segment.text)
+
+    def test_non_positive_window_is_rejected(self):
+        with self.assertRaises(ValueError):
+            list(caesar_segments.split_text('abc', 'window', window=0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Text statistics - NumPy and pure Python counts agree, and edits keep them exact
+Run with: python -m pytest test_stats.py (or python -m unittest test_stats)
+"""
+
+import unittest
+
+import caesar_engine
+from caesar_bench import english_text
+from caesar_stats import TextStats
+
+HAS_NUMPY = caesar_engine.numpy_backend() is not None
+
+TEXT = english_text(30000, 6) + " 1984 Ünïcödé ✓ 日本語\tÆsir, ß!\n"
+
+
+class TextStatsTest(unittest.TestCase):
+
+    def assertSameStats(self, stats, expected):
+        self.assertEqual(stats.counts, expected.counts)
+        self.assertEqual(stats.length, expected.length)
+        self.assertEqual(stats.summary(), expected.summary())
+
+    @unittest.skipUnless(HAS_NUMPY, "numpy is not installed")
+    def test_numpy_counts_match_python(self):
+        for text in (TEXT, TEXT.encode('utf-8'), "plain ascii", b"\x00\xff\x80"):
+            with self.subTest(text=text[:20]):
+                numpy_stats, python_stats = TextStats(), TextStats()
+                numpy_histogram = numpy_stats.update(text, 'numpy')
+                python_histogram = python_stats.update(text, 'python')
+                self.assertEqual(numpy_histogram, python_histogram)
+                self.assertSameStats(numpy_stats, python_stats)
+
+    def test_update_returns_the_chunk_histogram(self):
+        stats = TextStats()
+        for chunk in (TEXT[:1000], TEXT[1000:]):
+            self.assertEqual(stats.update(chunk), caesar_engine.letter_histogram(chunk))
+        self.assertEqual(stats.letter_histogram(), caesar_engine.letter_histogram(TEXT))
+
+    def test_classes(self):
+        stats = TextStats("ab 12, Ü\n")
+        self.assertEqual(stats.class_counts(),
+                         {'letters': 3, 'digits': 2, 'whitespace': 3, 'punctuation': 1})
+        self.assertEqual(stats.length, 9)
+
+    def test_remove_and_replace_match_a_fresh_count(self):
+        head, middle, tail = TEXT[:5000], TEXT[5000:6000], TEXT[6000:]
+        stats = TextStats(TEXT)
+        stats.replace(middle, "Edited ✓ line 42")
+        self.assertSameStats(stats, TextStats(head + "Edited ✓ line 42" + tail))
+        stats.remove(tail)
+        self.assertSameStats(stats, TextStats(head + "Edited ✓ line 42"))
+
+    def test_adding_stats_matches_counting_both(self):
+        merged = TextStats(TEXT[:7000]) + TextStats(TEXT[7000:])
+        self.assertSameStats(merged, TextStats(TEXT))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Streaming decode - files decoded chunk by chunk match the in-memory decode
+Run with: python -m pytest test_stream.py (or python -m unittest test_stream)
+"""
+
+import os
+import tempfile
+import unittest
+
+import caesar_engine
+import caesar_stream
+from caesar_bench import english_text
+
+
+class DecodeFileTest(unittest.TestCase):
+    DATA = (english_text(20000, 5) + " Ünïcödé ✓ 日本語\r\n").encode() + b"\xff\xfe invalid"
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.directory.name, 'source.txt')
+        self.destination = os.path.join(self.directory.name, 'decoded.txt')
+        with open(self.source, 'wb') as file:
+            file.write(self.DATA)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_matches_in_memory_decode(self):
+        for options in (caesar_engine.DEFAULT_OPTIONS,
+                        caesar_engine.DecodeOptions(preserve_case=False)):
+            expected = caesar_engine.caesar_cipher(self.DATA, -7, options)
+            for chunk_size in (1, 7, 4096, 1 << 20):
+                for use_mmap in (False, True):
+                    with self.subTest(options=options, chunk_size=chunk_size, use_mmap=use_mmap):
+                        written = caesar_stream.decode_file(self.source, self.destination, -7,
+                                                            options, chunk_size, use_mmap)
+                        with open(self.destination, 'rb') as file:
+                            self.assertEqual(file.read(), expected)
+                        self.assertEqual(written, len(expected))
+
+    def test_empty_file(self):
+        open(self.source, 'wb').close()
+        for use_mmap in (False, True):
+            self.assertEqual(caesar_stream.decode_file(self.source, self.destination, 3,
+                                                       use_mmap=use_mmap), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()